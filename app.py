@@ -1,11 +1,33 @@
 import magic
 import streamlit as st
 import logging
-from cv_parser import GenericCVParser
-from database import CVDocument, Session, engine
-from ocr_processor import extract_text_from_file
+from cv_parser import PARSER_VERSION, GenericCVParser
+from database import (
+    CV_PAGE_SIZE,
+    CVDocument,
+    Session,
+    add_cv_aliases,
+    current_generation,
+    engine,
+    find_known_content,
+    list_cv_page,
+    upsert_cv_documents,
+)
+from extraction_cache import ExtractionCache
+from file_store import FileStore, RecentFiles, content_hash
+from ingest_jobs import get_ingest_queue
+from ingest_pipeline import run_ingest_pipeline
+from search_index import SEARCH_RESULT_LIMIT, search_cvs
+from skills_index import find_cvs_with_skills, parse_skill_filter, skill_distribution
+from ocr_processor import (
+    DEFAULT_OCR_PROFILE,
+    OCR_PROFILES,
+    extract_text_from_file,
+    extraction_settings,
+)
 import os
 import base64
+from collections import deque, namedtuple
 from streamlit.components.v1 import html
 import pandas as pd
 
@@ -16,57 +38,230 @@ logger = logging.getLogger(__name__)
 
 UPLOAD_DIR = "cv_uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+upload_store = FileStore(UPLOAD_DIR)
 
 
-def process_uploaded_files(uploaded_files):
-    if not uploaded_files:
-        return
+@st.cache_resource(show_spinner=False)
+def get_parser():
+    """One parser per process; building its matchers runs nlp.make_doc over every pattern"""
+    return GenericCVParser()
+
+
+@st.cache_resource(show_spinner=False)
+def init_database():
+    """Create tables, search/skills indexes and triggers once per process, not on every rerun"""
+    CVDocument.metadata.create_all(engine)
+    return engine, Session
+
+
+@st.cache_resource(show_spinner=False)
+def get_extraction_cache():
+    return ExtractionCache()
+
+
+extraction_cache = get_extraction_cache()
+
+SEARCH_CACHE_ENTRIES = 256
+# Every write bumps the generation, so older stats entries are never read again;
+# keep just enough for a couple of concurrent sessions.
+STATS_CACHE_ENTRIES = 4
+
+
+@st.cache_resource(show_spinner=False)
+def get_recent_files():
+    """Recently served upload bytes for Download, shared by all reruns and sessions"""
+    return RecentFiles()
+
+
+# An upload that still has to be processed, with its bytes and content hash.
+PendingUpload = namedtuple("PendingUpload", ["name", "file_bytes", "content_hash"])
+
+
+def split_duplicates(uploaded_files):
+    """Hash uploads and set aside those whose content is already stored or repeated
+
+    Returns ``(pending, duplicates)``: PendingUpload tuples to process, and
+    (filename, filename of the CV with the same content, content hash) tuples
+    that need no work.
+    """
+    uploads = []
+    for file in uploaded_files:
+        file_bytes = file.getvalue()
+        uploads.append(
+            PendingUpload(os.path.basename(file.name), file_bytes, content_hash(file_bytes))
+        )
     session = Session()
     try:
+        known = find_known_content(session, [upload.content_hash for upload in uploads])
+    finally:
+        session.close()
+    pending, duplicates = [], []
+    for upload in uploads:
+        if upload.content_hash in known:
+            duplicates.append((upload.name, known[upload.content_hash], upload.content_hash))
+        else:
+            known[upload.content_hash] = upload.name
+            pending.append(upload)
+    return pending, duplicates
 
-        parser = GenericCVParser()
-        
-        for file in uploaded_files:
-            file_bytes = file.getvalue()
-            original_filename = file.name
-            cleaned_filename = os.path.basename(original_filename)
-            file_type = magic.from_buffer(file_bytes, mime=True)
-            file_path = os.path.join(UPLOAD_DIR, cleaned_filename)
-            with open(file_path, "wb") as f:
-                f.write(file_bytes)
-            logger.info(f"Processing file: {cleaned_filename} ({file_type})")
-            text = extract_text_from_file(file_bytes, file_type)
-            if not text:
-                st.warning(f"Could not extract text from {cleaned_filename}")
-                continue
-            existing_entry = (
-                session.query(CVDocument).filter_by(filename=cleaned_filename).first()
-            )
-            parsed_data = parser.parse(text)
-            if "raw_text" in parsed_data:
-                del parsed_data["raw_text"]
-
-            if existing_entry:
-                for key, value in parsed_data.items():
-                    setattr(existing_entry, key, value)
-                existing_entry.raw_text = text
-                st.info(f"Updated existing entry for {cleaned_filename}")
-            else:
-                cv_doc = CVDocument(filename=cleaned_filename, raw_text=text, **parsed_data)
-                session.add(cv_doc)
-                st.success(f"Added new entry for {cleaned_filename}")
+
+def link_duplicates(duplicates):
+    """Record duplicate uploads as aliases of the CV with their content"""
+    aliases = [(filename, digest) for filename, original, digest in duplicates if filename != original]
+    if not aliases:
+        return
+    session = Session()
+    try:
+        add_cv_aliases(session, aliases)
         session.commit()
-        st.success(f"Successfully processed {len(uploaded_files)} files")
-    except Exception as e:
-        session.rollback()
-        st.error(f"Error processing files: {str(e)}")
-        logger.error(f"Error in process_uploaded_files: {str(e)}", exc_info=True)
     finally:
         session.close()
 
-def open_pdf_in_new_tab(pdf_path):
-    with open(pdf_path, "rb") as f:
-        base64_pdf = base64.b64encode(f.read()).decode('utf-8')
+
+def report_duplicates(duplicates):
+    for filename, original, _ in duplicates:
+        st.info(f"{filename} has the same content as {original}, linked it to that CV")
+
+
+def extract_text_cached(file_bytes, file_type, ocr_profile=None):
+    """Extract text through the persistent extraction cache"""
+    cache_key = extraction_cache.make_key(
+        file_bytes, file_type, extraction_settings(ocr_profile)
+    )
+    text = extraction_cache.get(cache_key)
+    if text is None:
+        text = extract_text_from_file(file_bytes, file_type, ocr_profile=ocr_profile)
+        if text:
+            extraction_cache.put(cache_key, text)
+    else:
+        logger.info("Using cached extracted text")
+    return text
+
+
+def ingest_stored_files(jobs):
+    """Extract, parse and save a batch of stored uploads; run by the ingest workers
+
+    The jobs go through the staged ingest pipeline, so extracting one file
+    overlaps parsing and saving the ones before it, and texts that are ready
+    together are parsed through parse_many. Jobs whose content was saved
+    meanwhile are linked to that CV as an alias and end as "duplicate".
+    Returns the outcome of each job that did not simply succeed, by job id.
+    """
+    session = Session()
+    try:
+        known = find_known_content(session, [job["content_hash"] for job in jobs if job["content_hash"]])
+    finally:
+        session.close()
+    pending, duplicates = [], []
+    for job in jobs:
+        digest = job["content_hash"]
+        if digest in known:
+            # The same bytes were queued more than once and another job got there first.
+            logger.info(f"Ingest job {job['id']}: {job['filename']} has the same content as {known[digest]}")
+            duplicates.append((job, known[digest]))
+            continue
+        if digest:
+            known[digest] = job["filename"]
+        pending.append(job)
+    outcomes = _ingest_pending_jobs(pending) if pending else {}
+    link_duplicates([(job["filename"], original, job["content_hash"]) for job, original in duplicates])
+    for job, original in duplicates:
+        outcomes[job["id"]] = ("duplicate", f"Same content as {original}")
+    return outcomes
+
+
+def _ingest_pending_jobs(pending):
+    """Run jobs through the ingest pipeline; returns the error of each failed job"""
+    parser = get_parser()
+
+    def extract(job):
+        with upload_store.open(job["filename"], job["content_hash"]) as f:
+            file_bytes = f.read()
+        file_type = magic.from_buffer(file_bytes, mime=True)
+        logger.info(f"Ingest job {job['id']}: {job['filename']} ({file_type})")
+        return {
+            "filename": job["filename"],
+            "content_hash": job["content_hash"],
+            "parser_version": PARSER_VERSION,
+            "parse_mode": parser.mode,
+            "raw_text": extract_text_cached(file_bytes, file_type, job["ocr_profile"]),
+        }
+
+    def parse(texts):
+        return list(parser.parse_many(texts))
+
+    # Outcomes are reported by filename, in completion order.
+    job_ids = {}
+    for job in pending:
+        job_ids.setdefault(job["filename"], deque()).append(job["id"])
+    failures = {}
+    for outcome in run_ingest_pipeline(pending, extract, parse, upsert_cv_documents):
+        ids = job_ids.get(outcome["filename"])
+        if not ids:
+            continue
+        job_id = ids.popleft()
+        if outcome["status"] == "no_text":
+            failures[job_id] = f"Could not extract text from {outcome['filename']}"
+        elif outcome["status"] == "failed":
+            failures[job_id] = outcome["error"]
+    return failures
+
+
+def queue_uploaded_files(uploaded_files, ocr_profile=None):
+    """Store new uploads and queue them for the background workers
+
+    Returns the batch id, or None when every upload was already known.
+    """
+    pending, duplicates = split_duplicates(uploaded_files)
+    link_duplicates(duplicates)
+    report_duplicates(duplicates)
+    if not pending:
+        return None
+    for upload in pending:
+        upload_store.put(upload.file_bytes, upload.content_hash)
+    return get_ingest_queue(ingest_stored_files).enqueue(
+        [upload.name for upload in pending],
+        ocr_profile=ocr_profile,
+        content_hashes=[upload.content_hash for upload in pending],
+    )
+
+
+def ingest_status_view(batch_id):
+    """Show per-file progress of one batch of queued uploads"""
+    jobs = get_ingest_queue(ingest_stored_files).batch_status(batch_id)
+    if not jobs:
+        return
+    finished = sum(job["status"] in ("done", "duplicate", "failed") for job in jobs)
+    st.subheader("Processing status")
+    st.progress(finished / len(jobs), text=f"{finished} of {len(jobs)} files processed")
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {"File": job["filename"], "Status": job["status"], "Details": job["error"] or ""}
+                for job in jobs
+            ]
+        ),
+        hide_index=True,
+    )
+    if finished < len(jobs):
+        st.button("Refresh status")
+
+
+def read_upload_bytes(file_path):
+    """Read a stored upload, serving recently read files from a size-bounded cache
+
+    Returns None if the file does not exist.
+    """
+    return get_recent_files().read(file_path)
+
+def open_pdf_in_new_tab(filename, digest=None):
+    # The data: URL needs the whole file, so it is read once, through the same
+    # cache as downloads.
+    pdf_bytes = read_upload_bytes(upload_store.resolve(filename, digest))
+    if pdf_bytes is None:
+        st.error("File missing")
+        return
+    base64_pdf = base64.b64encode(pdf_bytes).decode('utf-8')
     js = f"""
     <script>
         window.open("data:application/pdf;base64,{base64_pdf}");
@@ -75,36 +270,80 @@ def open_pdf_in_new_tab(pdf_path):
     html(js, width=0, height=0)
 
 def cv_organizer_and_viewer(cv_entry):
-    """Display CV details with preview and download options"""
+    """Display CV details with preview and download options
+
+    Nothing is read from disk until Preview or Download is clicked.
+    """
     if isinstance(cv_entry, dict):
         filename = cv_entry.get("filename")
         cv_id = cv_entry.get("id", "N/A")
+        digest = cv_entry.get("content_hash")
     else:
         filename = cv_entry.filename
         cv_id = cv_entry.id
-    file_path = os.path.join(UPLOAD_DIR, filename)
+        digest = getattr(cv_entry, "content_hash", None)
     col1, col2, col3 = st.columns([4, 2, 2])
     with col1:
         st.write(f"📄 {filename} (ID: {cv_id})")
     with col2:
-        if os.path.exists(file_path):
-            if filename.lower().endswith('.pdf'):
-                if st.button(f"Preview", key=f"preview_{cv_id}"):
-                    open_pdf_in_new_tab(file_path)
-            else:
-                st.write("Preview not available")
+        if filename.lower().endswith('.pdf'):
+            if st.button(f"Preview", key=f"preview_{cv_id}"):
+                open_pdf_in_new_tab(filename, digest)
+        else:
+            st.write("Preview not available")
     
     with col3:
-        if os.path.exists(file_path):
-            with open(file_path, "rb") as f:
+        if st.button("Download", key=f"prepare_dl_{cv_id}"):
+            file_bytes = read_upload_bytes(upload_store.resolve(filename, digest))
+            if file_bytes is None:
+                st.error("File missing")
+            else:
                 st.download_button(
-                    "Download",
-                    data=f,
+                    "Save file",
+                    data=file_bytes,
                     file_name=filename,
                     key=f"dl_{cv_id}"
                 )
-        else:
-            st.error("File missing")
+
+# The cached views below take the database generation as their first argument,
+# so any ingest makes their previous results unreachable.
+@st.cache_data(show_spinner=False, max_entries=STATS_CACHE_ENTRIES)
+def cached_cv_count(generation):
+    session = Session()
+    try:
+        return session.query(CVDocument).count()
+    finally:
+        session.close()
+
+
+@st.cache_data(show_spinner=False, max_entries=STATS_CACHE_ENTRIES)
+def cached_skill_distribution(generation):
+    session = Session()
+    try:
+        return skill_distribution(session)
+    finally:
+        session.close()
+
+
+@st.cache_data(show_spinner=False, max_entries=SEARCH_CACHE_ENTRIES)
+def cached_search(generation, search_text, search_column):
+    """Skill filter for skills queries, falling back to full-text search
+
+    Returns at most SEARCH_RESULT_LIMIT + 1 CVs; the extra one only tells the
+    caller that there were more matches.
+    """
+    limit = SEARCH_RESULT_LIMIT + 1
+    session = Session()
+    try:
+        results = []
+        if search_column == "skills":
+            results = find_cvs_with_skills(session, parse_skill_filter(search_text), limit=limit)
+        if not results:
+            results = search_cvs(session, search_text, column=search_column, limit=limit)
+        return results
+    finally:
+        session.close()
+
 
 def chat_interface(query):
     if not query:
@@ -183,7 +422,6 @@ def chat_interface(query):
             
             return f"Showing details for CV: {cv.filename}"
         
-        results = []
         query_lower = query.lower()
         
         search_column = None
@@ -199,34 +437,38 @@ def chat_interface(query):
             search_column = "projects"
         elif "certification" in query_lower or "certificate" in query_lower:
             search_column = "certifications"
-            
-        cvs = session.query(CVDocument).all()
-        for cv in cvs:
-            if search_column:
-                column_data = getattr(cv, search_column)
-                if column_data:
-                    json_str = str(column_data).lower()
-                    search_terms = [term for term in query_lower.split() if term != search_column.lower() 
-                                    and term not in ["skill", "skills", "education", "experience", 
-                                                    "work", "personal", "contact", "project", "projects", 
-                                                    "certification", "certifications"]]
-                    search_term = " ".join(search_terms)
-                    if search_term and search_term in json_str:
-                        results.append(cv)
-            else:
-                if query_lower in cv.raw_text.lower():
-                    results.append(cv)
+
+        search_text = query_lower
+        if search_column:
+            search_text = " ".join(
+                term for term in query_lower.split() if term != search_column.lower()
+                and term not in ["skill", "skills", "education", "experience",
+                                 "work", "personal", "contact", "project", "projects",
+                                 "certification", "certifications"]
+            )
+        results = []
+        if search_text:
+            results = cached_search(current_generation(session), search_text, search_column)
         
         if not results:
             return "No matching CVs found."  
-        response = f"Found {len(results)} matching CVs:\n\n"
+        if len(results) > SEARCH_RESULT_LIMIT:
+            results = results[:SEARCH_RESULT_LIMIT]
+            response = (
+                f"Showing the first {SEARCH_RESULT_LIMIT} matching CVs; "
+                "refine the search to see the rest:\n\n"
+            )
+        else:
+            response = f"Found {len(results)} matching CVs:\n\n"
         for cv in results:
             col1, col2 = st.columns([5, 1])
             with col1:
                 cv_organizer_and_viewer(cv)
+                if cv["snippet"]:
+                    st.caption(cv["snippet"])
             with col2:
-                if st.button("Select", key=f"select_{cv.id}"):
-                    st.session_state['selected_cv_id'] = cv.id
+                if st.button("Select", key=f"select_{cv['id']}"):
+                    st.session_state['selected_cv_id'] = cv['id']
                     st.experimental_rerun()
         
         return response
@@ -254,12 +496,27 @@ def main():
             accept_multiple_files=True,
             key=f"uploaded_files_{st.session_state.uploader_key}",
         )
+        ocr_profile = st.selectbox(
+            "OCR profile",
+            list(OCR_PROFILES),
+            index=list(OCR_PROFILES).index(DEFAULT_OCR_PROFILE),
+            help="Only used for scanned PDFs. 'fast' suits clean scans, 'accurate' renders at "
+            "300 DPI in color, and 'adaptive' re-renders only pages that OCR poorly.",
+        )
         if uploaded_files:
             if st.button("Process Files"):
-                with st.spinner("Processing files..."):
-                    process_uploaded_files(uploaded_files)
+                batch_id = queue_uploaded_files(uploaded_files, ocr_profile=ocr_profile)
+                if batch_id:
+                    st.session_state["ingest_batch_id"] = batch_id
                 # force pseudo reset since streamlit cannot do it direct
                 st.session_state.uploader_key += 1
+        # Processing runs in background workers, so progress survives reruns and
+        # reconnects; fall back to the latest batch when this session has none.
+        batch_id = st.session_state.get("ingest_batch_id")
+        if batch_id is None:
+            batch_id = get_ingest_queue(ingest_stored_files).latest_batch_id()
+        if batch_id:
+            ingest_status_view(batch_id)
 
     elif page == "Search CVs":
         st.header("CV Search Interface")
@@ -304,29 +561,35 @@ def main():
         st.header("Database Statistics")
         session = Session()
         try:
-            cv_count = session.query(CVDocument).count()
+            generation = current_generation(session)
+            cv_count = cached_cv_count(generation)
             st.metric("Total CVs in Database", cv_count)
 
             if cv_count > 0:
                 st.subheader("CV Documents")
-                cvs = session.query(CVDocument).all()
+                # Stack of "after id" cursors, one per page visited.
+                page_cursors = st.session_state.setdefault("stats_page_cursors", [0])
+                cvs, has_more = list_cv_page(session, after_id=page_cursors[-1])
                 for cv in cvs:
                     cv_organizer_and_viewer(cv)
+
+                total_pages = -(-cv_count // CV_PAGE_SIZE)
+                col1, col2, col3 = st.columns([2, 4, 2])
+                with col1:
+                    if len(page_cursors) > 1 and st.button("Previous page"):
+                        page_cursors.pop()
+                        st.experimental_rerun()
+                with col2:
+                    st.caption(f"Page {len(page_cursors)} of {total_pages}")
+                with col3:
+                    if has_more and st.button("Next page"):
+                        page_cursors.append(cvs[-1].id)
+                        st.experimental_rerun()
                     
                 st.subheader("Skills Distribution")
-                all_skills = {}
-                for cv in cvs:
-                    if cv.skills:
-                        try:
-                            cv_skills = cv.skills if isinstance(cv.skills, list) else cv.skills.get('skills', [])
-                            for skill in cv_skills:
-                                if isinstance(skill, str):
-                                    all_skills[skill] = all_skills.get(skill, 0) + 1
-                        except:
-                            pass
+                skills_sorted = cached_skill_distribution(generation)
                 
-                if all_skills:
-                    skills_sorted = sorted(all_skills.items(), key=lambda x: x[1], reverse=True)
+                if skills_sorted:
                     skills_df = pd.DataFrame(skills_sorted, columns=["Skill", "Count"])
                     st.bar_chart(skills_df.set_index("Skill"))
                 else:
@@ -336,5 +599,5 @@ def main():
 
 
 if __name__ == "__main__":
-    CVDocument.metadata.create_all(engine)
+    init_database()
     main()
\ No newline at end of file
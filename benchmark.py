@@ -0,0 +1,150 @@
+"""Micro-benchmarks for the CV processing pipeline.
+
+Usage: python benchmark.py [spacy] [sections] [modes] [--docs N] [--repeat N]
+"""
+import argparse
+import re
+import time
+
+import spacy
+
+from cv_parser import (
+    PARSE_MODES,
+    SECTION_PATTERNS,
+    SPACY_MODEL,
+    GenericCVParser,
+    load_nlp,
+    nlp,
+    scoped_regions,
+    segment_sections,
+)
+
+SAMPLE_CV = """JOHN DOE
+john.doe@example.com | +1 (555) 123-4567 | linkedin.com/in/johndoe
+New York, NY
+
+EDUCATION
+Master of Science in Computer Science
+Stanford University | 2018 - 2020
+
+WORK EXPERIENCE
+Senior Software Engineer
+Google | Jan 2021 - Present
+Developed scalable web applications using React, Python, and AWS
+
+Software Developer
+Microsoft | Jun 2018 - Dec 2020
+Built and maintained RESTful APIs using Python and Flask
+
+SKILLS
+Python, JavaScript, SQL, Java, Docker, Kubernetes
+
+PROJECTS
+Project: Personal Website
+Developed a personal portfolio website using React and Node.js
+
+CERTIFICATIONS
+AWS Certified Solutions Architect - Amazon Web Services | 2022
+"""
+
+
+def _time_it(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_spacy(docs, repeat):
+    """Compare the full spaCy pipeline with the trimmed one the parser loads"""
+    texts = [SAMPLE_CV] * docs
+    pipelines = {
+        "full": spacy.load(SPACY_MODEL),
+        "trimmed": load_nlp(),
+    }
+    results = {}
+    for label, nlp in pipelines.items():
+        seconds = _time_it(lambda: list(nlp.pipe(texts)), repeat)
+        results[label] = seconds
+        print(f"{label:>8}: {', '.join(nlp.pipe_names) or '-'}")
+        print(f"{'':>8}  {seconds:.3f}s for {docs} docs ({docs / seconds:.1f} docs/s)")
+    print(f" speedup: {results['full'] / results['trimmed']:.2f}x")
+
+
+def _rescan_sections(text):
+    """The previous regex segmentation: one scan per section plus a rescan of the rest"""
+    sections = {}
+    for section, pattern in SECTION_PATTERNS.items():
+        matches = list(re.finditer(pattern, text, re.IGNORECASE))
+        if matches:
+            start = matches[0].end()
+            end = len(text)
+            for other_pattern in SECTION_PATTERNS.values():
+                other_matches = list(re.finditer(other_pattern, text[start:], re.IGNORECASE))
+                if other_matches:
+                    end = min(end, start + other_matches[0].start())
+            sections[section] = text[start:end].strip()
+    return sections
+
+
+def bench_sections(docs, repeat):
+    """Compare single-pass section segmentation with the per-section rescans"""
+    for copies in [1, 10, 100]:
+        text = SAMPLE_CV * copies
+        assert segment_sections(text) == _rescan_sections(text)
+        old = _time_it(lambda: [_rescan_sections(text) for _ in range(docs)], repeat)
+        new = _time_it(lambda: [segment_sections(text) for _ in range(docs)], repeat)
+        print(
+            f"{len(text):>8} chars: rescan {old / docs * 1000:.3f}ms, "
+            f"single pass {new / docs * 1000:.3f}ms ({old / new:.1f}x)"
+        )
+
+
+def bench_modes(docs, repeat):
+    """Compare the parse modes on the sample CV and on a long one with many projects"""
+    long_cv = SAMPLE_CV + "".join(
+        f"Project: Tool {i}\nBuilt an internal tool with Python and Docker for team {i}\n" for i in range(100)
+    )
+    parsers = {mode: GenericCVParser(mode=mode) for mode in PARSE_MODES}
+    for label, text in [("sample", SAMPLE_CV), ("long", long_cv)]:
+        texts = [text] * docs
+        header, experience = scoped_regions(text)
+        full_tokens = len(nlp.make_doc(text))
+        scoped_tokens = len(nlp.make_doc(header)) + len(nlp.make_doc(experience or text))
+        print(f"{label}: {full_tokens} tokens, {scoped_tokens} through NER in scoped mode")
+        results = {}
+        for mode, parser in parsers.items():
+            seconds = _time_it(lambda: list(parser.parse_many(texts)), repeat)
+            results[mode] = seconds
+            print(
+                f"{mode:>8}: {seconds:.3f}s for {docs} docs ({docs / seconds:.1f} docs/s, "
+                f"{results['full'] / seconds:.1f}x full)"
+            )
+
+
+BENCHMARKS = {
+    "spacy": bench_spacy,
+    "sections": bench_sections,
+    "modes": bench_modes,
+}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("benchmarks", nargs="*", help=f"any of: {', '.join(BENCHMARKS)}")
+    arg_parser.add_argument("--docs", type=int, default=200)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        arg_parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    for name in args.benchmarks or list(BENCHMARKS):
+        print(f"== {name}")
+        BENCHMARKS[name](args.docs, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""Bulk-ingest a directory of CVs into the database, without the Streamlit app.
+
+Usage: python bulk_ingest.py DIRECTORY [--workers N] [--batch-size N] [--ocr-profile NAME] [--parse-mode MODE] [--force]
+
+Files are extracted and parsed in a pool of worker processes and written to the
+database in batches. A file whose CV was saved after the file was last modified
+is skipped, so an interrupted backfill can simply be run again, and a file
+whose bytes are already stored under any name is only hashed. CVs are named by
+their path relative to DIRECTORY, so files with the same name in different
+subdirectories are kept apart.
+"""
+import argparse
+import datetime
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import magic
+
+from cv_parser import PARSE_MODE, PARSE_MODES, PARSER_VERSION, GenericCVParser
+from database import Base, CVDocument, Session, engine, upsert_cv_documents
+from file_store import FileStore, content_hash
+from ocr_processor import (
+    DEFAULT_OCR_PROFILE,
+    OCR_PROFILES,
+    SUPPORTED_FILE_TYPES,
+    count_pdf_pages,
+    extract_text_from_file,
+)
+
+logger = logging.getLogger(__name__)
+
+INGEST_BATCH_SIZE = 100
+# Same directory the app serves previews and downloads from.
+UPLOAD_DIR = "cv_uploads"
+
+# Parser, already stored content hashes and OCR thread count of the current
+# worker process, set up once by _init_worker.
+_parser = None
+_known_hashes = frozenset()
+_ocr_workers = None
+
+
+def _init_worker(known_hashes, parse_mode=PARSE_MODE):
+    global _parser, _known_hashes, _ocr_workers
+    # Forked workers must not reuse the parent's pooled SQLite connections.
+    engine.dispose(close=False)
+    _parser = GenericCVParser(mode=parse_mode)
+    _known_hashes = known_hashes
+    # The pool already keeps every CPU busy; a per-file OCR thread pool on top
+    # would oversubscribe it.
+    _ocr_workers = 1
+
+
+def find_files(directory):
+    """Yield every file under directory, in a stable order"""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            yield os.path.join(root, name)
+
+
+def cv_filename(path, root=None):
+    """Name a file's CV is saved under: its path relative to root, or its base name"""
+    if root is None:
+        return os.path.basename(path)
+    return os.path.relpath(path, root).replace(os.sep, "/")
+
+
+def pending_files(paths, session, root=None):
+    """Drop files whose CV bulk ingest already saved after the file was last modified
+
+    A CV uploaded through the app under the same name does not count; the file
+    is still hashed, and saved unless its content is already stored.
+    """
+    ingested = dict(
+        session.query(CVDocument.filename, CVDocument.updated_at).filter(CVDocument.source == "bulk")
+    )
+    for path in paths:
+        updated_at = ingested.get(cv_filename(path, root))
+        modified_at = datetime.datetime.utcfromtimestamp(os.path.getmtime(path))
+        if updated_at is None or updated_at < modified_at:
+            yield path
+
+
+def process_file(path, ocr_profile=None, upload_dir=UPLOAD_DIR, known_hashes=None, parser=None, root=None):
+    """Extract and parse one file; returns a result dict and never raises
+
+    ``record`` is ready for upsert_cv_documents, or None if the file was
+    unsupported, a duplicate of known content or failed, in which case
+    ``error`` says why. The CV is named by cv_filename(path, root).
+    """
+    filename = cv_filename(path, root)
+    result = {
+        "filename": filename,
+        "record": None,
+        "pages": 0,
+        "error": None,
+        "unsupported": False,
+        "duplicate": False,
+    }
+    try:
+        with open(path, "rb") as f:
+            file_bytes = f.read()
+        digest = content_hash(file_bytes)
+        if digest in (_known_hashes if known_hashes is None else known_hashes):
+            result["duplicate"] = True
+            return result
+        file_type = magic.from_buffer(file_bytes, mime=True)
+        if file_type not in SUPPORTED_FILE_TYPES:
+            result["unsupported"] = True
+            return result
+        result["pages"] = _page_count(file_bytes, file_type)
+        text = extract_text_from_file(
+            file_bytes, file_type, ocr_profile=ocr_profile, ocr_workers=_ocr_workers
+        )
+        if not text:
+            result["error"] = "Could not extract text"
+            return result
+        parser = parser or _parser or GenericCVParser()
+        parsed_data = parser.parse(text)
+        parsed_data.pop("raw_text", None)
+        if upload_dir:
+            # The app previews and downloads CVs from its upload directory.
+            FileStore(upload_dir).put(file_bytes, digest)
+        result["record"] = dict(
+            parsed_data,
+            filename=filename,
+            content_hash=digest,
+            parser_version=PARSER_VERSION,
+            parse_mode=parser.mode,
+            source="bulk",
+            raw_text=text,
+        )
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def _page_count(file_bytes, file_type):
+    if file_type != "application/pdf":
+        return 1
+    try:
+        return count_pdf_pages(file_bytes)
+    except Exception:
+        return 0
+
+
+def run_ingest(
+    directory,
+    workers=None,
+    batch_size=INGEST_BATCH_SIZE,
+    ocr_profile=None,
+    force=False,
+    upload_dir=UPLOAD_DIR,
+    session_factory=Session,
+    parse_mode=PARSE_MODE,
+):
+    """Ingest every supported file under directory and return throughput counters"""
+    started = time.perf_counter()
+    all_paths = list(find_files(directory))
+    session = session_factory()
+    try:
+        paths = all_paths if force else list(pending_files(all_paths, session, directory))
+        known_hashes = set() if force else {
+            digest
+            for (digest,) in session.query(CVDocument.content_hash).filter(
+                CVDocument.content_hash.isnot(None)
+            )
+        }
+    finally:
+        session.close()
+    if upload_dir:
+        os.makedirs(upload_dir, exist_ok=True)
+
+    stats = {
+        "files": 0,
+        "pages": 0,
+        "saved": 0,
+        "failed": 0,
+        "unsupported": 0,
+        "skipped": len(all_paths) - len(paths),
+        "duplicates": 0,
+        "seconds": 0.0,
+    }
+    batch = []
+
+    def flush():
+        # A changed file replaces the version bulk ingest saved earlier; a CV
+        # uploaded through the app under the same name is kept.
+        result = upsert_cv_documents(batch, session_factory=session_factory, replace_source="bulk")
+        stats["saved"] += len(result["inserted"]) + len(result["updated"])
+        stats["failed"] += len(result["failed"])
+        batch.clear()
+
+    workers = workers or os.cpu_count() or 1
+    for result in _results(paths, directory, workers, ocr_profile, upload_dir, known_hashes, parse_mode):
+        stats["files"] += 1
+        stats["pages"] += result["pages"]
+        if result["unsupported"]:
+            stats["unsupported"] += 1
+        elif result["duplicate"] or (
+            result["record"] and result["record"]["content_hash"] in known_hashes
+        ):
+            # Worker processes only know what was stored when the run started;
+            # copies within this run are caught here.
+            stats["duplicates"] += 1
+        elif result["error"]:
+            stats["failed"] += 1
+            logger.warning(f"Failed to ingest {result['filename']}: {result['error']}")
+        else:
+            known_hashes.add(result["record"]["content_hash"])
+            batch.append(result["record"])
+            if len(batch) >= batch_size:
+                flush()
+    if batch:
+        flush()
+
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def _results(paths, root, workers, ocr_profile, upload_dir, known_hashes, parse_mode):
+    """Yield process_file results as they finish, keeping a bounded number in flight"""
+    if workers == 1:
+        parser = GenericCVParser(mode=parse_mode)
+        for path in paths:
+            yield process_file(path, ocr_profile, upload_dir, known_hashes, parser, root)
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(frozenset(known_hashes), parse_mode),
+    ) as executor:
+        paths = iter(paths)
+        in_flight = set()
+        while True:
+            for path in paths:
+                in_flight.add(executor.submit(process_file, path, ocr_profile, upload_dir, root=root))
+                if len(in_flight) >= workers * 4:
+                    break
+            if not in_flight:
+                return
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("directory")
+    arg_parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    arg_parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    arg_parser.add_argument("--ocr-profile", choices=list(OCR_PROFILES), default=DEFAULT_OCR_PROFILE)
+    arg_parser.add_argument("--force", action="store_true", help="re-ingest files already in the database")
+    arg_parser.add_argument(
+        "--parse-mode", choices=PARSE_MODES, default=PARSE_MODE,
+        help="lite skips spaCy for fast triage; upgrade later with reparse.py --upgrade-lite",
+    )
+    args = arg_parser.parse_args()
+    if not os.path.isdir(args.directory):
+        arg_parser.error(f"not a directory: {args.directory}")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    Base.metadata.create_all(engine)
+    stats = run_ingest(
+        args.directory,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        ocr_profile=args.ocr_profile,
+        force=args.force,
+        parse_mode=args.parse_mode,
+    )
+    seconds = max(stats["seconds"], 1e-9)
+    print(
+        f"Processed {stats['files']} files ({stats['pages']} pages) in {stats['seconds']:.1f}s: "
+        f"{stats['files'] / seconds:.2f} files/s, {stats['pages'] / seconds:.2f} pages/s"
+    )
+    print(
+        f"Saved {stats['saved']}, failed {stats['failed']}, unsupported {stats['unsupported']}, "
+        f"duplicates {stats['duplicates']}, skipped {stats['skipped']} already ingested"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,51 @@
+import os
 import re
+from bisect import bisect_left, bisect_right
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import spacy
-from dateutil.parser import parse
 from spacy.matcher import Matcher, PhraseMatcher
-
-nlp = spacy.load("en_core_web_sm")
+from date_normalizer import normalize_date
+
+SPACY_MODEL = os.environ.get("SPACY_MODEL", "en_core_web_sm")
+
+# GenericCVParser only reads doc.ents and token LOWER/TEXT attributes, so the
+# tagger, dependency parser and lemmatizer are never needed. In en_core_web_sm
+# the ner component has its own tok2vec, so the shared one can go as well.
+# Override with a comma separated list in SPACY_EXCLUDE ("" keeps everything).
+SPACY_EXCLUDE = [
+    name.strip()
+    for name in os.environ.get(
+        "SPACY_EXCLUDE", "tok2vec,tagger,parser,attribute_ruler,lemmatizer,senter"
+    ).split(",")
+    if name.strip()
+]
+
+
+def load_nlp(model: str = SPACY_MODEL, exclude: Optional[List[str]] = None):
+    """Load the spaCy pipeline without the components the parser does not use"""
+    return spacy.load(model, exclude=SPACY_EXCLUDE if exclude is None else exclude)
+
+
+nlp = load_nlp()
+
+PARSE_BATCH_SIZE = 32
+# Stamped on every saved CV. Bump it with any change to the patterns or
+# extractors that changes parse output, then run reparse.py to refresh the
+# stored CVs from their raw_text.
+PARSER_VERSION = 1
+
+# "full" runs the spaCy pipeline over the whole CV. "scoped" runs it only over
+# the header and the experience section, the only places whose entities the
+# extractors read, and matches skills on a tokenizer-only doc; a CV without an
+# experience heading is still parsed in full. "lite" never calls spaCy: it is
+# regexes only, for triage, and leaves work_experience empty and the location
+# to the "City, ST" pattern. reparse.py --upgrade-lite re-parses those CVs.
+PARSE_MODES = ("full", "scoped", "lite")
+PARSE_MODE = os.environ.get("CV_PARSE_MODE", "full")
+# Most of the text before the first section heading that scoped mode treats as
+# the header, so a long unheaded summary does not go through NER.
+SCOPED_HEADER_MAX_CHARS = 1000
 
 def clean_text(text: str) -> str:
     text = re.sub(r'^--- Page \d+ ---$', '', text, flags=re.MULTILINE)
@@ -19,11 +59,145 @@ def clean_text(text: str) -> str:
         cleaned_lines.append(line)
     return "\n".join(cleaned_lines)
 
+SECTION_PATTERNS = {
+    "education": r'(?:EDUCATION|Education|ACADEMIC|Academic|QUALIFICATIONS|Qualifications|DEGREES|Degrees)(?:\s*\n+)',
+    "experience": r'(?:WORK\s*EXPERIENCE|Work\s*Experience|EMPLOYMENT|Employment|PROFESSIONAL\s*EXPERIENCE|Professional\s*Experience)(?:\s*\n+)',
+    "skills": r'(?:SKILLS|Skills|COMPETENCIES|Competencies|TECHNICAL\s*SKILLS|Technical\s*Skills)(?:\s*\n+)',
+    "projects": r'(?:PROJECTS|Projects|KEY\s*PROJECTS|Key\s*Projects|RESEARCH|Research)(?:\s*\n+)',
+    "certifications": r'(?:CERTIFICATIONS|Certifications|LICENSES|Licenses|COURSES|Courses)(?:\s*\n+)'
+}
+
+# Experience headings for scoped parsing. Unlike SECTION_PATTERNS this takes a
+# bare "Experience", but only on a line of its own.
+EXPERIENCE_HEADING_RE = re.compile(
+    r'^[ \t]*(?:(?:work|professional|relevant)[ \t]+)?'
+    r'(?:experience|employment(?:[ \t]+history)?)[ \t]*:?[ \t]*$',
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# All headings in one alternation, so a single scan finds every section boundary.
+SECTION_HEADING_RE = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, pattern in SECTION_PATTERNS.items()),
+    re.IGNORECASE,
+)
+
+
+def segment_sections(text: str) -> Dict[str, str]:
+    """Split text into sections at regex headings in a single pass.
+
+    A section runs from the end of the first heading for it up to the next
+    heading of any kind. Later repeats of the same heading only end the
+    previous section.
+    """
+    headings = [(m.start(), m.end(), m.lastgroup) for m in SECTION_HEADING_RE.finditer(text)]
+    found = {}
+    for i, (_, heading_end, name) in enumerate(headings):
+        if name in found:
+            continue
+        section_end = headings[i + 1][0] if i + 1 < len(headings) else len(text)
+        found[name] = text[heading_end:section_end].strip()
+    return {name: found[name] for name in SECTION_PATTERNS if name in found}
+
+
+def scoped_regions(text: str) -> Tuple[str, Optional[str]]:
+    """Return the header and experience text of a CV for scoped parsing.
+
+    The header runs up to the first section heading, the experience region
+    from an experience heading up to the next section heading. Without an
+    experience heading the experience region is None: job titles could be
+    anywhere, so such a CV is parsed in full.
+    """
+    experience_heading = EXPERIENCE_HEADING_RE.search(text)
+    if experience_heading is None:
+        return "", None
+    first_heading = SECTION_HEADING_RE.search(text)
+    header_end = experience_heading.start()
+    if first_heading is not None:
+        header_end = min(header_end, first_heading.start())
+    next_heading = SECTION_HEADING_RE.search(text, experience_heading.end())
+    experience_end = next_heading.start() if next_heading else len(text)
+    return (
+        text[:min(header_end, SCOPED_HEADER_MAX_CHARS)],
+        text[experience_heading.end():experience_end],
+    )
+
+
+SKILLS = [
+    "Python", "JavaScript", "TypeScript", "Java", "C++", "C#", "Go", "Ruby", "PHP", "Swift", "Kotlin", "Rust", "Scala", "Perl", "R", "Matlab",
+    "HTML", "CSS", "React", "Angular", "Vue", "Svelte", "Bootstrap", "Tailwind", "jQuery",
+    "Node.js", "Express", "Django", "Flask", "Spring", "Laravel", "Ruby on Rails", "ASP.NET", ".NET Core", "FastAPI", "NestJS",
+    "MongoDB", "MySQL", "PostgreSQL", "Oracle", "SQL Server", "SQLite", "Redis", "Cassandra", "DynamoDB", "MariaDB", "Elasticsearch",
+    "AWS", "Azure", "GCP", "DigitalOcean", "Heroku", "Netlify", "Vercel", "Docker", "Kubernetes", "Jenkins", "CI/CD", "Terraform", "Ansible", "Git", "GitHub", "GitLab", "CircleCI", "Travis CI",
+    "Machine Learning", "TensorFlow", "PyTorch", "Scikit-learn", "Pandas", "NumPy", "Data Analysis", "Deep Learning", "Keras", "NLTK", "spaCy",
+    "iOS", "Android", "Flutter", "Xamarin", "React Native", "SwiftUI", "Jetpack Compose",
+    "Selenium", "Jest", "Mocha", "Chai", "Cypress", "Postman", "SoapUI",
+    "RESTful API", "GraphQL", "WebSockets", "Microservices", "Agile", "Scrum", "Kanban", "Jira", "UI/UX", "TDD", "Design Patterns",
+    "Project Management", "Business Strategy", "Client Relationship Management", "Data-Driven Decision Making", "Financial Analysis", "Market Research", "Change Management",
+    "Adobe Photoshop", "Adobe Illustrator", "Adobe InDesign", "Sketch", "Figma", "UX Research", "Wireframing", "Prototyping", "Animation", "Motion Graphics", "Creative Direction",
+    "Microsoft Office", "Google Workspace", "Scheduling", "Time Management", "CRM Systems", "Bookkeeping", "Data Entry", "Report Generation", "Customer Service",
+    "Leadership", "Strategic Planning", "Budget Management", "Team Management", "Negotiation", "Decision Making", "Risk Management", "Public Speaking", "Stakeholder Management",
+    "Digital Marketing", "SEO", "Content Strategy", "Social Media Management", "Salesforce", "Lead Generation", "Brand Management", "Customer Engagement",
+    "Contract Negotiation", "Regulatory Compliance", "Risk Assessment", "Legal Research", "Policy Analysis"
+]
+
+# Tokenizer-free stand-in for the skills PhraseMatcher used in lite mode:
+# case-sensitive, longest skill first, and not inside a longer word.
+SKILL_RE = re.compile(
+    r'(?<![\w+#.])(?:'
+    + "|".join(re.escape(skill) for skill in sorted(SKILLS, key=len, reverse=True))
+    + r')(?![\w+#])'
+)
+
+EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_RE = re.compile(r'\b(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b')
+LINKEDIN_RE = re.compile(r'(?:linkedin\.com/in/[\w-]+|[Ll]inkedin)')
+GITHUB_RE = re.compile(r'(?:github\.com/[\w-]+|[Gg]ithub)')
+NAME_RE = re.compile(r'(\b[A-Z][a-zA-Z]+\b)\s+(\b[A-Z][a-zA-Z]+\b)')
+LOCATION_RE = re.compile(r'([A-Z][a-zA-Z]+),\s*([A-Z]{2})')
+
+
+def _first_match(pattern, text: str) -> Optional[str]:
+    match = pattern.search(text)
+    return match.group(0) if match else None
+
+
+class EntityIndex:
+    """Entities of one doc grouped by label and sorted by start token.
+
+    Lets the extractors find the next entity after a token, or all entities
+    starting inside a token window, with a binary search instead of a scan
+    over doc.ents for every match.
+    """
+
+    def __init__(self, doc):
+        self._ents = {}
+        for ent in doc.ents:
+            self._ents.setdefault(ent.label_, []).append(ent)
+        self._starts = {}
+        for label, ents in self._ents.items():
+            ents.sort(key=lambda ent: ent.start)
+            self._starts[label] = [ent.start for ent in ents]
+
+    def next_after(self, label: str, token_index: int):
+        """First entity with the given label starting after token_index, or None"""
+        starts = self._starts.get(label, [])
+        i = bisect_right(starts, token_index)
+        return self._ents[label][i] if i < len(starts) else None
+
+    def between(self, label: str, low: int, high: int) -> list:
+        """Entities with the given label whose start token lies strictly between low and high"""
+        starts = self._starts.get(label, [])
+        return self._ents.get(label, [])[bisect_right(starts, low):bisect_left(starts, high)]
+
+
 # NOTE : The parser is still not accurate, in certain cases with differing formatting,
 # it may fail to correctly identify and extract information.
 # I am trying to improve it by adding more patterns and improving the accuracy of the spacy model.
 class GenericCVParser:
-    def __init__(self):
+    def __init__(self, mode: str = PARSE_MODE):
+        if mode not in PARSE_MODES:
+            raise ValueError(f"Unknown parse mode {mode!r}, expected one of {', '.join(PARSE_MODES)}")
+        self.mode = mode
         self.matcher = Matcher(nlp.vocab)
         self.phrase_matcher = PhraseMatcher(nlp.vocab)
         self._add_patterns()
@@ -69,36 +243,95 @@ class GenericCVParser:
         ]
         self.matcher.add("JOB_TITLE", job_title_patterns)
 
-        skills = [
-            "Python", "JavaScript", "TypeScript", "Java", "C++", "C#", "Go", "Ruby", "PHP", "Swift", "Kotlin", "Rust", "Scala", "Perl", "R", "Matlab",
-            "HTML", "CSS", "React", "Angular", "Vue", "Svelte", "Bootstrap", "Tailwind", "jQuery",
-            "Node.js", "Express", "Django", "Flask", "Spring", "Laravel", "Ruby on Rails", "ASP.NET", ".NET Core", "FastAPI", "NestJS",
-            "MongoDB", "MySQL", "PostgreSQL", "Oracle", "SQL Server", "SQLite", "Redis", "Cassandra", "DynamoDB", "MariaDB", "Elasticsearch",
-            "AWS", "Azure", "GCP", "DigitalOcean", "Heroku", "Netlify", "Vercel", "Docker", "Kubernetes", "Jenkins", "CI/CD", "Terraform", "Ansible", "Git", "GitHub", "GitLab", "CircleCI", "Travis CI",
-            "Machine Learning", "TensorFlow", "PyTorch", "Scikit-learn", "Pandas", "NumPy", "Data Analysis", "Deep Learning", "Keras", "NLTK", "spaCy",
-            "iOS", "Android", "Flutter", "Xamarin", "React Native", "SwiftUI", "Jetpack Compose",
-            "Selenium", "Jest", "Mocha", "Chai", "Cypress", "Postman", "SoapUI",
-            "RESTful API", "GraphQL", "WebSockets", "Microservices", "Agile", "Scrum", "Kanban", "Jira", "UI/UX", "TDD", "Design Patterns",
-            "Project Management", "Business Strategy", "Client Relationship Management", "Data-Driven Decision Making", "Financial Analysis", "Market Research", "Change Management",
-            "Adobe Photoshop", "Adobe Illustrator", "Adobe InDesign", "Sketch", "Figma", "UX Research", "Wireframing", "Prototyping", "Animation", "Motion Graphics", "Creative Direction",
-            "Microsoft Office", "Google Workspace", "Scheduling", "Time Management", "CRM Systems", "Bookkeeping", "Data Entry", "Report Generation", "Customer Service",
-            "Leadership", "Strategic Planning", "Budget Management", "Team Management", "Negotiation", "Decision Making", "Risk Management", "Public Speaking", "Stakeholder Management",
-            "Digital Marketing", "SEO", "Content Strategy", "Social Media Management", "Salesforce", "Lead Generation", "Brand Management", "Customer Engagement",
-            "Contract Negotiation", "Regulatory Compliance", "Risk Assessment", "Legal Research", "Policy Analysis"
-        ]
-        skill_patterns = [nlp.make_doc(text) for text in skills]
+        skill_patterns = [nlp.make_doc(text) for text in SKILLS]
         self.phrase_matcher.add("SKILLS", skill_patterns)
 
     def parse(self, text: str, use_layout_analysis: bool = True) -> Dict:
         text = clean_text(text)
-        doc = nlp(text)
+        if self.mode == "lite":
+            return self._parse_regions(text, None, None, None, use_layout_analysis)
+        if self.mode == "scoped":
+            header, experience = scoped_regions(text)
+            if experience is not None:
+                return self._parse_scoped(text, nlp(header), nlp(experience), use_layout_analysis)
+        return self._parse_doc(nlp(text), use_layout_analysis=use_layout_analysis)
+
+    def parse_many(
+        self,
+        texts: Iterable[str],
+        batch_size: int = PARSE_BATCH_SIZE,
+        n_process: int = 1,
+        use_layout_analysis: bool = True,
+    ) -> Iterator[Dict]:
+        """Parse several CVs, streaming them through nlp.pipe in batches.
+
+        Yields one result per text, in input order, with the same structure as parse().
+        """
+        cleaned_texts = (clean_text(text) for text in texts)
+        if self.mode == "lite":
+            for text in cleaned_texts:
+                yield self._parse_regions(text, None, None, None, use_layout_analysis)
+            return
+        if self.mode == "scoped":
+            yield from self._parse_many_scoped(cleaned_texts, batch_size, n_process, use_layout_analysis)
+            return
+        for doc in nlp.pipe(cleaned_texts, batch_size=batch_size, n_process=n_process):
+            yield self._parse_doc(doc, use_layout_analysis=use_layout_analysis)
+
+    def _parse_many_scoped(self, texts, batch_size, n_process, use_layout_analysis):
+        def regions():
+            for text in texts:
+                header, experience = scoped_regions(text)
+                if experience is None:
+                    yield "", (text, True)
+                    yield text, None
+                else:
+                    yield header, (text, False)
+                    yield experience, None
+
+        # Each CV contributes two consecutive docs: its header (empty when the
+        # CV is parsed in full) and its experience section or whole text.
+        docs = nlp.pipe(regions(), as_tuples=True, batch_size=batch_size * 2, n_process=n_process)
+        for (header_doc, (text, in_full)), (doc, _) in zip(docs, docs):
+            if in_full:
+                yield self._parse_doc(doc, use_layout_analysis=use_layout_analysis)
+            else:
+                yield self._parse_scoped(text, header_doc, doc, use_layout_analysis)
+
+    def _parse_scoped(self, text, header_doc, experience_doc, use_layout_analysis):
+        return self._parse_regions(
+            text,
+            header_doc=header_doc,
+            experience_doc=experience_doc,
+            skills_doc=nlp.make_doc(text),
+            use_layout_analysis=use_layout_analysis,
+        )
+
+    def _parse_doc(self, doc, use_layout_analysis: bool = True) -> Dict:
+        return self._parse_regions(
+            doc.text,
+            header_doc=doc,
+            experience_doc=doc,
+            skills_doc=doc,
+            use_layout_analysis=use_layout_analysis,
+        )
+
+    def _parse_regions(self, text, header_doc, experience_doc, skills_doc, use_layout_analysis=True) -> Dict:
+        """Run the extractors; each doc only needs to cover the text its extractor reads
+
+        A doc passed as None is not used: no entities for personal_info, no
+        work_experience, and skills matched by regex over text.
+        """
         sections = self._identify_sections(text, use_layout_analysis=use_layout_analysis)
 
         return {
-            "personal_info": self._extract_personal_info(doc),
+            "personal_info": self._extract_personal_info(header_doc, text),
             "education": self._extract_education(sections.get("education", "")),
-            "work_experience": self._extract_experience(doc, sections.get("experience", "")),
-            "skills": self._extract_skills(doc, sections.get("skills", "")),
+            "work_experience": (
+                self._extract_experience(experience_doc, sections.get("experience", ""))
+                if experience_doc is not None else []
+            ),
+            "skills": self._extract_skills(skills_doc, sections.get("skills", ""), text),
             "projects": self._extract_projects(sections.get("projects", "")),
             "certifications": self._extract_certifications(sections.get("certifications", "")),
         }
@@ -132,32 +365,11 @@ class GenericCVParser:
 
             return sections_text_based
         else:
-            section_patterns = {
-                "education": r'(?:EDUCATION|Education|ACADEMIC|Academic|QUALIFICATIONS|Qualifications|DEGREES|Degrees)(?:\s*\n+)',
-                "experience": r'(?:WORK\s*EXPERIENCE|Work\s*Experience|EMPLOYMENT|Employment|PROFESSIONAL\s*EXPERIENCE|Professional\s*Experience)(?:\s*\n+)',
-                "skills": r'(?:SKILLS|Skills|COMPETENCIES|Competencies|TECHNICAL\s*SKILLS|Technical\s*Skills)(?:\s*\n+)',
-                "projects": r'(?:PROJECTS|Projects|KEY\s*PROJECTS|Key\s*Projects|RESEARCH|Research)(?:\s*\n+)',
-                "certifications": r'(?:CERTIFICATIONS|Certifications|LICENSES|Licenses|COURSES|Courses)(?:\s*\n+)'
-            }
-
-            sections = {}
-            for section, pattern in section_patterns.items():
-                matches = list(re.finditer(pattern, text, re.IGNORECASE))
-                if matches:
-                    start = matches[0].end()
-
-                    end = len(text)
-                    for other_pattern in section_patterns.values():
-                        other_matches = list(re.finditer(other_pattern, text[start:], re.IGNORECASE))
-                        if other_matches:
-                            potential_end = start + other_matches[0].start()
-                            if potential_end < end:
-                                end = potential_end
-
-                    sections[section] = text[start:end].strip()
+            return segment_sections(text)
 
-            return sections
-    def _extract_personal_info(self, doc) -> Dict:
+    def _extract_personal_info(self, doc, text: Optional[str] = None) -> Dict:
+        """Contact details by regex over text (default doc.text), location from doc's GPE entities if given"""
+        text = doc.text if text is None else text
         info = {
             "name": None,
             "email": None,
@@ -167,10 +379,10 @@ class GenericCVParser:
             "location": None
         }
 
-        info["email"] = next(iter(re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', doc.text)), None)
-        info["phone"] = next(iter(re.findall(r'\b(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b', doc.text)), None)
+        info["email"] = _first_match(EMAIL_RE, text)
+        info["phone"] = _first_match(PHONE_RE, text)
 
-        first_lines = doc.text.split('\n')[:5]
+        first_lines = text.split('\n')[:5]
         for line in first_lines:
             line = line.strip()
             if line and all(c.isupper() or c.isspace() for c in line):
@@ -178,18 +390,19 @@ class GenericCVParser:
                 break
 
         if not info["name"]:
-            name_match = re.search(r'(\b[A-Z][a-zA-Z]+\b)\s+(\b[A-Z][a-zA-Z]+\b)', doc.text[:200])
+            name_match = NAME_RE.search(text[:200])
             info["name"] = f"{name_match.group(1)} {name_match.group(2)}" if name_match else None
 
-        info["linkedin"] = next(iter(re.findall(r'(?:linkedin\.com/in/[\w-]+|[Ll]inkedin)', doc.text)), None)
-        info["github"] = next(iter(re.findall(r'(?:github\.com/[\w-]+|[Gg]ithub)', doc.text)), None)
+        info["linkedin"] = _first_match(LINKEDIN_RE, text)
+        info["github"] = _first_match(GITHUB_RE, text)
 
-        for ent in doc.ents:
-            if ent.label_ == "GPE" and not info["location"]:
-                info["location"] = ent.text
+        if doc is not None:
+            for ent in doc.ents:
+                if ent.label_ == "GPE" and not info["location"]:
+                    info["location"] = ent.text
 
         if not info["location"]:
-            location_match = re.search(r'([A-Z][a-zA-Z]+),\s*([A-Z]{2})', doc.text)
+            location_match = LOCATION_RE.search(text)
             if location_match:
                 info["location"] = f"{location_match.group(1)}, {location_match.group(2)}"
 
@@ -237,13 +450,15 @@ class GenericCVParser:
     def _extract_experience(self, doc, section_text: str) -> List[Dict]:
         experience = []
         matches = self.matcher(doc)
+        entity_index = EntityIndex(doc)
 
         for match_id, start, end in matches:
             if nlp.vocab.strings[match_id] == "JOB_TITLE":
                 entry = {"title": doc[start:end].text}
 
-                org = next((ent.text for ent in doc.ents if ent.label_ == "ORG" and ent.start > start), None)
-                dates = self._find_dates_near(doc, start, end)
+                org_ent = entity_index.next_after("ORG", start)
+                org = org_ent.text if org_ent is not None else None
+                dates = self._find_dates_near(doc, start, end, entity_index)
 
                 entry.update({
                     "company": org,
@@ -255,11 +470,10 @@ class GenericCVParser:
 
         return experience
 
-    def _find_dates_near(self, doc, start: int, end: int) -> Dict:
-        dates = []
-        for ent in doc.ents:
-            if ent.label_ == "DATE" and start - 5 < ent.start < end + 5:
-                dates.append(ent.text)
+    def _find_dates_near(self, doc, start: int, end: int, entity_index: Optional[EntityIndex] = None) -> Dict:
+        if entity_index is None:
+            entity_index = EntityIndex(doc)
+        dates = [ent.text for ent in entity_index.between("DATE", start - 5, end + 5)]
 
         date_ranges = re.findall(r'(\d{4})-(\d{4})', doc.text[max(0, start-30):min(len(doc.text), end+30)])
         for start_year, end_year in date_ranges:
@@ -283,7 +497,7 @@ class GenericCVParser:
         matches = self.phrase_matcher(doc[start:end])
         return [doc[start + s:start + e].text for _, s, e in matches]
 
-    def _extract_skills(self, doc, section_text: str) -> List[str]:
+    def _extract_skills(self, doc, section_text: str, text: Optional[str] = None) -> List[str]:
         skills = set()
 
         if section_text:
@@ -291,9 +505,12 @@ class GenericCVParser:
                 if any(c.isalnum() for c in line):
                     skills.update(re.split(r',|\||•|\t|:', line))
 
-        matches = self.phrase_matcher(doc)
-        for _, start, end in matches:
-            skills.add(doc[start:end].text)
+        if doc is None:
+            skills.update(SKILL_RE.findall(text))
+        else:
+            matches = self.phrase_matcher(doc)
+            for _, start, end in matches:
+                skills.add(doc[start:end].text)
 
         return [s.strip() for s in skills if s.strip()]
 
@@ -342,11 +559,7 @@ class GenericCVParser:
         return certs
 
     def _parse_date(self, date_str: str) -> Optional[str]:
-        try:
-            dt = parse(date_str, fuzzy=True)
-            return dt.isoformat()
-        except:
-            return None
+        return normalize_date(date_str)
         
     def _analyze_text_layout(self, text: str) -> Dict[str, List[Tuple[int, int]]]:
         """Analyze text layout to identify section boundaries based on spacing and formatting"""
@@ -1,23 +1,71 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, JSON, DateTime
+from sqlalchemy import (
+    create_engine,
+    text,
+    event,
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    JSON,
+    DateTime,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import deferred, sessionmaker
 import datetime
+import logging
+import os
+from search_index import create_search_index, drop_search_index
+from skills_index import create_skills_index
+
+logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+# Engine settings, overridable through the environment. SQLite runs in WAL mode
+# so readers in other Streamlit sessions are not blocked by an upload batch
+# writing, and busy_timeout makes writers wait for each other instead of
+# failing with "database is locked".
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///cv_database.db")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL").upper()
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.environ.get("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
 
 class CVDocument(Base):
     __tablename__ = "cv_documents"
 
     id = Column(Integer, primary_key=True)
     filename = Column(String(255), unique=True, index=True)
+    # sha256 of the uploaded bytes; identical files are only processed once.
+    content_hash = Column(String(64), index=True)
     personal_info = Column(JSON)
     education = Column(JSON)
     work_experience = Column(JSON)
     skills = Column(JSON)
     projects = Column(JSON)
     certifications = Column(JSON)
-    raw_text = Column(Text)
+    # PARSER_VERSION of the parser that produced the sections above; NULL for
+    # CVs parsed before versioning. Older rows are refreshed by reparse.py.
+    parser_version = Column(Integer, index=True)
+    # GenericCVParser mode that produced them; "lite" rows lack NER-based fields.
+    parse_mode = Column(String(16), index=True)
+    # "bulk" for CVs saved by bulk_ingest.py, named by their path under the
+    # ingested directory; NULL for uploads through the app.
+    source = Column(String(16))
+    # Only loaded when accessed, so listing and detail views don't pull whole CVs.
+    raw_text = deferred(Column(Text))
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(
         DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow
@@ -30,16 +78,396 @@ class CVDocument(Base):
         return {
             "id": self.id,
             "filename": self.filename,
+            "content_hash": self.content_hash,
             "personal_info": self.personal_info,
             "education": self.education,
             "work_experience": self.work_experience,
             "skills": self.skills,
             "projects": self.projects,
             "certifications": self.certifications,
+            "parser_version": self.parser_version,
+            "parse_mode": self.parse_mode,
+            "source": self.source,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
 
 
-engine = create_engine("sqlite:///cv_database.db")
+class CVSkill(Base):
+    """One skill of one CV, kept in sync with CVDocument.skills by SQLite triggers"""
+
+    __tablename__ = "cv_skills"
+    __table_args__ = (
+        UniqueConstraint("cv_id", "skill_normalized"),
+        Index("ix_cv_skills_skill_cv", "skill_normalized", "cv_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    cv_id = Column(Integer, ForeignKey("cv_documents.id", ondelete="CASCADE"), nullable=False)
+    skill_normalized = Column(String(255), nullable=False)
+    skill_raw = Column(String(255), nullable=False)
+
+    def __repr__(self):
+        return f"<CVSkill(cv_id={self.cv_id}, skill='{self.skill_normalized}')>"
+
+
+class CVAlias(Base):
+    """Another filename a stored CV's content was uploaded under
+
+    Linked by content hash, so an alias can be recorded before the CV itself
+    has been saved.
+    """
+
+    __tablename__ = "cv_aliases"
+    __table_args__ = (UniqueConstraint("content_hash", "filename"),)
+
+    id = Column(Integer, primary_key=True)
+    content_hash = Column(String(64), nullable=False, index=True)
+    filename = Column(String(255), nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    def __repr__(self):
+        return f"<CVAlias(filename='{self.filename}', content_hash='{self.content_hash}')>"
+
+
+class ExtractionCacheEntry(Base):
+    __tablename__ = "extraction_cache"
+
+    cache_key = Column(String(64), primary_key=True)
+    text = Column(Text)
+    size_bytes = Column(Integer)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f"<ExtractionCacheEntry(cache_key='{self.cache_key}', size_bytes={self.size_bytes})>"
+
+
+class IngestJob(Base):
+    """One uploaded file waiting for, or gone through, background extraction and parsing"""
+
+    __tablename__ = "ingest_jobs"
+    __table_args__ = (Index("ix_ingest_jobs_status_id", "status", "id"),)
+
+    id = Column(Integer, primary_key=True)
+    batch_id = Column(String(32), nullable=False, index=True)
+    filename = Column(String(255), nullable=False)
+    content_hash = Column(String(64))
+    ocr_profile = Column(String(32))
+    # queued -> running -> done | duplicate | failed
+    status = Column(String(16), nullable=False, default="queued")
+    error = Column(Text)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    def __repr__(self):
+        return f"<IngestJob(id={self.id}, filename='{self.filename}', status='{self.status}')>"
+
+
+class DatabaseGeneration(Base):
+    """Single-row counter bumped by triggers whenever cv_documents changes
+
+    Caches of derived views (counts, charts, search results) key on it, so they
+    are invalidated by any ingest, from the app, the job queue or the CLI.
+    """
+
+    __tablename__ = "db_generation"
+
+    id = Column(Integer, primary_key=True)
+    generation = Column(Integer, nullable=False, default=0)
+
+
+GENERATION_DDL = [
+    "INSERT OR IGNORE INTO db_generation (id, generation) VALUES (1, 0)",
+] + [
+    f"""CREATE TRIGGER IF NOT EXISTS cv_documents_generation_{operation.lower()}
+        AFTER {operation} ON cv_documents BEGIN
+            UPDATE db_generation SET generation = generation + 1 WHERE id = 1;
+        END"""
+    for operation in ("INSERT", "UPDATE", "DELETE")
+]
+
+
+def current_generation(session):
+    """Return the generation counter; it changes every time a CV is added, updated or removed"""
+    return session.query(DatabaseGeneration.generation).filter_by(id=1).scalar() or 0
+
+
+CV_PAGE_SIZE = 50
+
+
+def list_cv_page(session, after_id=0, page_size=CV_PAGE_SIZE):
+    """Return one page of CVs after after_id, ordered by id, with only listing columns
+
+    Uses keyset pagination on the primary key, so each page costs the same no
+    matter how deep it is. Returns ``(rows, has_more)``; pass the last row's id
+    as after_id to get the next page.
+    """
+    rows = (
+        session.query(
+            CVDocument.id, CVDocument.filename, CVDocument.content_hash, CVDocument.created_at
+        )
+        .filter(CVDocument.id > after_id)
+        .order_by(CVDocument.id)
+        .limit(page_size + 1)
+        .all()
+    )
+    return rows[:page_size], len(rows) > page_size
+
+
+def find_known_content(session, content_hashes):
+    """Map each given content hash that is already stored to the filename of its CV"""
+    content_hashes = list(set(content_hashes))
+    known = {}
+    # Stay well below SQLite's limit on bound parameters.
+    for start in range(0, len(content_hashes), 500):
+        rows = session.query(CVDocument.content_hash, CVDocument.filename).filter(
+            CVDocument.content_hash.in_(content_hashes[start:start + 500])
+        )
+        known.update(dict(rows))
+    return known
+
+
+def add_cv_aliases(session, aliases):
+    """Record (filename, content_hash) pairs of duplicate uploads; the caller commits
+
+    The CV with that content becomes findable by the alias filename too.
+    """
+    rows = [{"filename": filename, "content_hash": digest} for filename, digest in aliases if digest]
+    if rows:
+        session.execute(sqlite_insert(CVAlias.__table__).values(rows).on_conflict_do_nothing())
+
+
+UPSERT_CHUNK_SIZE = int(os.environ.get("UPSERT_CHUNK_SIZE", "200"))
+UPSERT_COLUMNS = [
+    "content_hash",
+    "personal_info",
+    "education",
+    "work_experience",
+    "skills",
+    "projects",
+    "certifications",
+    "parser_version",
+    "parse_mode",
+    "source",
+    "raw_text",
+]
+
+
+def upsert_cv_documents(records, chunk_size=UPSERT_CHUNK_SIZE, session_factory=None, replace_source=None):
+    """Insert or update parsed CVs by filename, one statement and one commit per chunk
+
+    Each record is a dict with a filename plus any of UPSERT_COLUMNS; missing
+    columns are stored as NULL. If a chunk fails it is retried one record at a
+    time, so a single bad CV only loses itself. Returns a dict with the
+    ``inserted`` and ``updated`` filenames, ``failed`` mapping filename to error
+    and ``renamed`` mapping filename to the name a clashing CV was saved under.
+
+    A record whose filename is taken by a CV with different content is saved
+    as a new CV, named "name (2).pdf" and so on, instead of replacing it,
+    unless that CV's source is replace_source.
+    """
+    session_factory = session_factory or Session
+    # A later record for the same file replaces an earlier one, as it would
+    # have with one upsert per file.
+    by_file = {}
+    for record in records:
+        key = (record["filename"], record.get("content_hash"))
+        by_file.pop(key, None)
+        by_file[key] = record
+    records = list(by_file.values())
+
+    result = {"inserted": [], "updated": [], "failed": {}, "renamed": {}}
+    session = session_factory()
+    try:
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start:start + chunk_size]
+            try:
+                inserted, updated, renamed = _upsert_chunk(session, chunk, replace_source)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logger.warning(
+                    f"Bulk upsert of {len(chunk)} CVs failed, retrying one by one: {str(e)}"
+                )
+                inserted, updated, renamed = _upsert_one_by_one(
+                    session, chunk, result["failed"], replace_source
+                )
+            result["inserted"].extend(inserted)
+            result["updated"].extend(updated)
+            result["renamed"].update(renamed)
+    finally:
+        session.close()
+    return result
+
+
+def _upsert_one_by_one(session, chunk, failed, replace_source):
+    inserted, updated, renamed = [], [], {}
+    for record in chunk:
+        try:
+            one_inserted, one_updated, one_renamed = _upsert_chunk(session, [record], replace_source)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            failed[record["filename"]] = str(e)
+            logger.error(f"Could not save {record['filename']}: {str(e)}", exc_info=True)
+            continue
+        inserted.extend(one_inserted)
+        updated.extend(one_updated)
+        renamed.update(one_renamed)
+    return inserted, updated, renamed
+
+
+def _clashes(stored_hash, digest):
+    return stored_hash is not None and digest is not None and stored_hash != digest
+
+
+def _free_filename(session, filename, digest, taken):
+    """First "name (n).ext" that is free or already holds this content"""
+    stem, ext = os.path.splitext(filename)
+    number = 2
+    while True:
+        candidate = f"{stem} ({number}){ext}"
+        if candidate in taken:
+            stored_hash = taken[candidate]
+        else:
+            stored = session.query(CVDocument.content_hash).filter_by(filename=candidate).first()
+            if stored is None:
+                return candidate
+            stored_hash = stored.content_hash
+        if stored_hash == digest:
+            return candidate
+        number += 1
+
+
+def _upsert_chunk(session, chunk, replace_source=None):
+    stored, replaceable = {}, set()
+    for filename, digest, source in session.query(
+        CVDocument.filename, CVDocument.content_hash, CVDocument.source
+    ).filter(CVDocument.filename.in_([record["filename"] for record in chunk])):
+        stored[filename] = digest
+        if replace_source is not None and source == replace_source:
+            replaceable.add(filename)
+    now = datetime.datetime.utcnow()
+    # Stored filename -> (requested filename, row); names taken in this chunk
+    # map to their content hash.
+    rows, taken, renamed = {}, {}, {}
+    for record in chunk:
+        filename = record["filename"]
+        digest = record.get("content_hash")
+        target = filename
+        if (filename not in replaceable and _clashes(stored.get(filename), digest)) or _clashes(
+            taken.get(filename), digest
+        ):
+            target = _free_filename(session, filename, digest, taken)
+            renamed[filename] = target
+            logger.info(f"{filename} differs from the CV already saved under that name, saving it as {target}")
+        taken[target] = digest
+        rows[target] = (filename, dict(
+            {column: record.get(column) for column in UPSERT_COLUMNS},
+            filename=target,
+            created_at=now,
+            updated_at=now,
+        ))
+    existing = set(stored) | {
+        filename
+        for (filename,) in session.query(CVDocument.filename).filter(
+            CVDocument.filename.in_(list(renamed.values()))
+        )
+    }
+    statement = sqlite_insert(CVDocument.__table__).values([row for _, row in rows.values()])
+    statement = statement.on_conflict_do_update(
+        index_elements=["filename"],
+        set_={
+            column: statement.excluded[column] for column in UPSERT_COLUMNS + ["updated_at"]
+        },
+    )
+    session.execute(statement)
+    # Results are reported under the requested filename.
+    inserted = [filename for target, (filename, _) in rows.items() if target not in existing]
+    updated = [filename for target, (filename, _) in rows.items() if target in existing]
+    return inserted, updated, renamed
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(target, connection, **kw):
+    add_missing_columns(connection)
+    # The FTS5 table and the sync triggers are not ORM objects, so create_all
+    # sets them up (and indexes any rows they are missing) every time it runs.
+    create_search_index(connection)
+    create_skills_index(connection)
+    if connection.dialect.name == "sqlite":
+        for statement in GENERATION_DDL:
+            connection.execute(text(statement))
+
+
+def add_missing_columns(connection):
+    """Add columns (and their indexes) that were added to the models after a table was created
+
+    create_all only creates missing tables, so without this an existing SQLite
+    database would never get new nullable columns such as content_hash.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    for table in Base.metadata.sorted_tables:
+        existing = {
+            row[1] for row in connection.execute(text(f"PRAGMA table_info({table.name})"))
+        }
+        added = {column.name for column in table.columns if column.name not in existing}
+        for column in table.columns:
+            if column.name in added:
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.execute(
+                    text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+                )
+        for index in table.indexes:
+            if added & {column.name for column in index.columns}:
+                index.create(connection, checkfirst=True)
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def _before_drop(target, connection, **kw):
+    drop_search_index(connection)
+
+
+def create_db_engine(url=DATABASE_URL, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW):
+    """Create the database engine; SQLite files get WAL, tuned pragmas and a connection pool"""
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_engine(url, pool_size=pool_size, max_overflow=max_overflow, pool_pre_ping=True)
+
+    if make_url(url).database in (None, "", ":memory:"):
+        # Every connection to :memory: is a separate database, so keep SQLAlchemy's
+        # single-connection default there.
+        db_engine = create_engine(url)
+    else:
+        db_engine = create_engine(
+            url,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000, "check_same_thread": False},
+        )
+    event.listen(db_engine, "connect", _set_sqlite_pragmas)
+    return db_engine
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if SQLITE_JOURNAL_MODE not in _JOURNAL_MODES:
+        raise ValueError(f"Unsupported SQLITE_JOURNAL_MODE: {SQLITE_JOURNAL_MODE}")
+    if SQLITE_SYNCHRONOUS not in _SYNCHRONOUS_MODES:
+        raise ValueError(f"Unsupported SQLITE_SYNCHRONOUS: {SQLITE_SYNCHRONOUS}")
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA mmap_size={int(SQLITE_MMAP_SIZE)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+engine = create_db_engine()
 Session = sessionmaker(bind=engine)
\ No newline at end of file
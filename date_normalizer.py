@@ -0,0 +1,101 @@
+import calendar
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, Optional
+
+from dateutil.parser import parse
+
+DATE_CACHE_SIZE = 4096
+
+# Month names as dateutil accepts them, so fast-path results match its output.
+_MONTHS = {}
+for _number in range(1, 13):
+    _MONTHS[calendar.month_abbr[_number].lower()] = _number
+    _MONTHS[calendar.month_name[_number].lower()] = _number
+_MONTHS["sept"] = 9
+
+_YEAR = re.compile(r"^\s*(\d{4})\s*$")
+_MONTH_NAME_YEAR = re.compile(r"^\s*([A-Za-z]+)\.?\s+(\d{4})\s*$")
+_MONTH_NUMBER_YEAR = re.compile(r"^\s*(\d{1,2})\s*[/-]\s*(\d{4})\s*$")
+_ONGOING = {"present", "current", "now", "today", "ongoing"}
+
+_stats = {"fast_path": 0, "fallback": 0}
+
+
+def normalize_date(date_str: str, today: Optional[date] = None) -> Optional[str]:
+    """Normalize a date string from a CV to ISO format, or None if it is not a date.
+
+    Missing parts are filled in from today's date, exactly as
+    dateutil.parser.parse(fuzzy=True) does. Bare years, "Jan 2020" and "03/2021"
+    are handled with regexes; anything else goes to a memoized dateutil call.
+    "Present" and similar words are not dates and return None.
+    """
+    if not isinstance(date_str, str):
+        return None
+    today = today or date.today()
+
+    fast_result = _fast_path(date_str, today)
+    if fast_result is not None:
+        _stats["fast_path"] += 1
+        return fast_result or None
+
+    _stats["fallback"] += 1
+    return _fuzzy_parse(date_str, today)
+
+
+def date_cache_stats() -> Dict[str, int]:
+    """Return how many dates took the fast path and how the dateutil memo is doing"""
+    info = _fuzzy_parse.cache_info()
+    return {
+        "fast_path": _stats["fast_path"],
+        "fallback": _stats["fallback"],
+        "memo_hits": info.hits,
+        "memo_misses": info.misses,
+        "memo_size": info.currsize,
+        "memo_max_size": info.maxsize,
+    }
+
+
+def clear_date_cache():
+    """Reset the dateutil memo and all counters"""
+    _fuzzy_parse.cache_clear()
+    for key in _stats:
+        _stats[key] = 0
+
+
+def _fast_path(date_str: str, today: date) -> Optional[str]:
+    """Return the ISO date, "" for a known non-date, or None when dateutil is needed"""
+    if date_str.strip().lower() in _ONGOING:
+        return ""
+
+    match = _YEAR.match(date_str)
+    if match:
+        return _build(int(match.group(1)), today.month, today.day)
+
+    match = _MONTH_NAME_YEAR.match(date_str)
+    if match and match.group(1).lower() in _MONTHS:
+        return _build(int(match.group(2)), _MONTHS[match.group(1).lower()], today.day)
+
+    match = _MONTH_NUMBER_YEAR.match(date_str)
+    if match and 1 <= int(match.group(1)) <= 12:
+        return _build(int(match.group(2)), int(match.group(1)), today.day)
+
+    return None
+
+
+def _build(year: int, month: int, day: int) -> Optional[str]:
+    if year < 1000:
+        return None
+    # Like dateutil, clamp a default day that does not exist in the target month.
+    day = min(day, calendar.monthrange(year, month)[1])
+    return datetime(year, month, day).isoformat()
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _fuzzy_parse(date_str: str, today: date) -> Optional[str]:
+    default = datetime(today.year, today.month, today.day)
+    try:
+        return parse(date_str, fuzzy=True, default=default).isoformat()
+    except (ValueError, OverflowError):
+        return None
@@ -0,0 +1,119 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+
+from sqlalchemy import func
+
+from database import ExtractionCacheEntry, Session
+from ocr_processor import extraction_settings
+
+logger = logging.getLogger(__name__)
+
+# Total size of cached text kept in the database; least recently used entries
+# are evicted once it is exceeded.
+EXTRACTION_CACHE_MAX_BYTES = int(os.environ.get("EXTRACTION_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+class ExtractionCache:
+    """Persistent cache of extracted text, keyed by file content and extraction settings"""
+
+    def __init__(self, session_factory=Session, max_bytes=EXTRACTION_CACHE_MAX_BYTES):
+        self.session_factory = session_factory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(file_bytes, file_type, settings=None):
+        """Hash the file bytes together with everything that changes the extracted text"""
+        if settings is None:
+            settings = extraction_settings()
+        digest = hashlib.sha256(file_bytes)
+        digest.update(json.dumps({"file_type": file_type, **settings}, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached text for key, or None on a miss"""
+        session = self.session_factory()
+        try:
+            entry = session.get(ExtractionCacheEntry, key)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry.last_used_at = datetime.datetime.utcnow()
+            text = entry.text
+            session.commit()
+            self.hits += 1
+            return text
+        except Exception as e:
+            session.rollback()
+            self.misses += 1
+            logger.warning(f"Extraction cache lookup failed: {str(e)}")
+            return None
+        finally:
+            session.close()
+
+    def put(self, key, text):
+        """Store extracted text and evict old entries if the cache is over its size limit"""
+        session = self.session_factory()
+        try:
+            now = datetime.datetime.utcnow()
+            session.merge(
+                ExtractionCacheEntry(
+                    cache_key=key,
+                    text=text,
+                    size_bytes=len(text.encode("utf-8")),
+                    created_at=now,
+                    last_used_at=now,
+                )
+            )
+            session.flush()
+            self._evict(session)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.warning(f"Extraction cache store failed: {str(e)}")
+        finally:
+            session.close()
+
+    def _evict(self, session):
+        total = session.query(func.coalesce(func.sum(ExtractionCacheEntry.size_bytes), 0)).scalar()
+        if total <= self.max_bytes:
+            return
+        oldest_first = session.query(
+            ExtractionCacheEntry.cache_key, ExtractionCacheEntry.size_bytes
+        ).order_by(ExtractionCacheEntry.last_used_at)
+        evict_keys = []
+        for cache_key, size_bytes in oldest_first:
+            if total <= self.max_bytes:
+                break
+            evict_keys.append(cache_key)
+            total -= size_bytes or 0
+        session.query(ExtractionCacheEntry).filter(
+            ExtractionCacheEntry.cache_key.in_(evict_keys)
+        ).delete(synchronize_session=False)
+        self.evictions += len(evict_keys)
+        logger.info(f"Evicted {len(evict_keys)} extraction cache entries")
+
+    def stats(self):
+        """Return hit/miss counters for this process plus the current cache size"""
+        session = self.session_factory()
+        try:
+            entries, total_bytes = session.query(
+                func.count(ExtractionCacheEntry.cache_key),
+                func.coalesce(func.sum(ExtractionCacheEntry.size_bytes), 0),
+            ).one()
+        finally:
+            session.close()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "total_bytes": total_bytes,
+        }
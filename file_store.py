@@ -0,0 +1,123 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Stored files live under <root>/<ab>/<cd>/<hash>, so no directory grows past
+# 256 entries per level, however many CVs there are.
+FILE_STORE_SHARD_LEVELS = 2
+FILE_STORE_SHARD_WIDTH = 2
+RECENT_FILES_MAX_BYTES = int(os.environ.get("RECENT_FILES_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+def content_hash(file_bytes):
+    """Identity of an uploaded file: the sha256 of its bytes"""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+class FileStore:
+    """Content-addressed store for uploaded originals
+
+    Each distinct file is kept once, under its sha256, in directories sharded
+    by hash prefix. Writes go to a temporary file that is renamed into place,
+    so readers never see a partial file and concurrent writers of the same
+    content cannot corrupt it.
+    """
+
+    def __init__(self, root, shard_levels=FILE_STORE_SHARD_LEVELS, shard_width=FILE_STORE_SHARD_WIDTH):
+        self.root = root
+        self.shard_levels = shard_levels
+        self.shard_width = shard_width
+
+    def path_for(self, digest):
+        shards = [
+            digest[level * self.shard_width:(level + 1) * self.shard_width]
+            for level in range(self.shard_levels)
+        ]
+        return os.path.join(self.root, *shards, digest)
+
+    def exists(self, digest):
+        return os.path.exists(self.path_for(digest))
+
+    def put(self, file_bytes, digest=None):
+        """Store file_bytes unless identical content is already stored; returns the hash"""
+        digest = digest or content_hash(file_bytes)
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            return digest
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(file_bytes)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return digest
+
+    def resolve(self, filename, digest=None):
+        """Path of a CV's stored file
+
+        Falls back to the flat <root>/<hash> layout and, for CVs saved before
+        content hashing, to <root>/<filename>.
+        """
+        if digest:
+            for path in (self.path_for(digest), os.path.join(self.root, digest)):
+                if os.path.exists(path):
+                    return path
+        return os.path.join(self.root, filename)
+
+    def open(self, filename, digest=None):
+        """Open a CV's stored file for reading; raises FileNotFoundError if it is missing"""
+        return open(self.resolve(filename, digest), "rb")
+
+
+class RecentFiles:
+    """Size-bounded LRU cache of recently read files, keyed by path, mtime and size
+
+    Streamlit re-executes app.py in a fresh namespace on every rerun, so the
+    app keeps its instance in st.cache_resource rather than in a module global.
+    """
+
+    def __init__(self, max_bytes=RECENT_FILES_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._files = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def read(self, file_path):
+        """Return the bytes of file_path, or None if the file does not exist"""
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        key = (file_path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            data = self._files.get(key)
+            if data is not None:
+                self._files.move_to_end(key)
+                return data
+        with open(file_path, "rb") as f:
+            data = f.read()
+        if len(data) <= self.max_bytes:
+            with self._lock:
+                if key not in self._files:
+                    self._files[key] = data
+                    self._bytes += len(data)
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._files.popitem(last=False)
+                    self._bytes -= len(evicted)
+        return data
+
+    def paths(self):
+        """Cached paths, least recently used first"""
+        with self._lock:
+            return [key[0] for key in self._files]
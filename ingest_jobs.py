@@ -0,0 +1,264 @@
+import datetime
+import logging
+import os
+import threading
+import uuid
+
+from sqlalchemy import select, update
+
+from database import IngestJob, Session
+
+logger = logging.getLogger(__name__)
+
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", "2"))
+INGEST_POLL_SECONDS = float(os.environ.get("INGEST_POLL_SECONDS", "2"))
+# Jobs that were running when the process died are queued again on restart,
+# until they have been started this many times, so a file that kills the
+# process cannot crash it forever.
+INGEST_MAX_ATTEMPTS = int(os.environ.get("INGEST_MAX_ATTEMPTS", "3"))
+# Most queued jobs a worker claims at once. They reach the handler together, so
+# a multi-file upload is parsed in batches rather than one CV at a time.
+INGEST_CLAIM_SIZE = int(os.environ.get("INGEST_CLAIM_SIZE", "8"))
+
+
+class IngestJobQueue:
+    """Ingest jobs stored in the database, drained by a pool of worker threads
+
+    ``handler(jobs)`` does the work for a list of up to ``claim_size`` jobs,
+    dicts with id, batch_id, filename, content_hash and ocr_profile. It returns
+    a dict mapping the id of each job that failed to its error, or to a
+    ``(status, message)`` pair for a job that ended otherwise, such as
+    ("duplicate", "Same content as a.pdf"); if it raises, all of those jobs fail. Because the queue lives in the database, jobs
+    survive browser disconnects and restarts.
+    """
+
+    def __init__(
+        self,
+        handler,
+        session_factory=Session,
+        workers=INGEST_WORKERS,
+        poll_seconds=INGEST_POLL_SECONDS,
+        max_attempts=INGEST_MAX_ATTEMPTS,
+        claim_size=INGEST_CLAIM_SIZE,
+    ):
+        self.handler = handler
+        self.session_factory = session_factory
+        self.workers = max(1, workers)
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.claim_size = max(1, claim_size)
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+    def enqueue(self, filenames, ocr_profile=None, content_hashes=None):
+        """Queue one job per file and return the id of the batch they belong to"""
+        batch_id = uuid.uuid4().hex
+        content_hashes = content_hashes or [None] * len(filenames)
+        session = self.session_factory()
+        try:
+            session.add_all(
+                [
+                    IngestJob(
+                        batch_id=batch_id,
+                        filename=filename,
+                        content_hash=digest,
+                        ocr_profile=ocr_profile,
+                    )
+                    for filename, digest in zip(filenames, content_hashes)
+                ]
+            )
+            session.commit()
+        finally:
+            session.close()
+        self._wakeup.set()
+        return batch_id
+
+    def start(self):
+        """Requeue jobs interrupted by an earlier shutdown and start the workers
+
+        Calling it again while the workers are running does nothing.
+        """
+        with self._lock:
+            if self._threads:
+                return
+            self.recover()
+            self._stopping.clear()
+            for number in range(self.workers):
+                thread = threading.Thread(
+                    target=self._work, name=f"ingest-worker-{number}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"Started {self.workers} ingest workers")
+
+    def stop(self, timeout=None):
+        """Stop the workers once their current job is finished"""
+        with self._lock:
+            self._stopping.set()
+            self._wakeup.set()
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+
+    def recover(self):
+        """Put jobs left running by a crash back in the queue, or fail them after too many tries
+
+        Returns the number of jobs queued again.
+        """
+        session = self.session_factory()
+        try:
+            requeued = session.execute(
+                update(IngestJob)
+                .where(IngestJob.status == "running", IngestJob.attempts < self.max_attempts)
+                .values(status="queued", started_at=None)
+            ).rowcount
+            abandoned = session.execute(
+                update(IngestJob)
+                .where(IngestJob.status == "running")
+                .values(
+                    status="failed",
+                    error=f"Interrupted {self.max_attempts} times, giving up",
+                    finished_at=datetime.datetime.utcnow(),
+                )
+            ).rowcount
+            session.commit()
+        finally:
+            session.close()
+        if requeued or abandoned:
+            logger.info(f"Requeued {requeued} interrupted ingest jobs, gave up on {abandoned}")
+        return requeued
+
+    def run_pending(self):
+        """Run queued jobs in the calling thread until there are none; returns how many ran"""
+        count = 0
+        while True:
+            ran = self._run_next()
+            if not ran:
+                return count
+            count += ran
+
+    def batch_status(self, batch_id):
+        """Return the jobs of one batch in upload order, as dicts"""
+        session = self.session_factory()
+        try:
+            jobs = (
+                session.query(IngestJob)
+                .filter(IngestJob.batch_id == batch_id)
+                .order_by(IngestJob.id)
+                .all()
+            )
+            return [
+                {
+                    "filename": job.filename,
+                    "status": job.status,
+                    "error": job.error,
+                    "attempts": job.attempts,
+                    "started_at": job.started_at,
+                    "finished_at": job.finished_at,
+                }
+                for job in jobs
+            ]
+        finally:
+            session.close()
+
+    def latest_batch_id(self):
+        """Return the most recently queued batch, or None if nothing was ever queued"""
+        session = self.session_factory()
+        try:
+            return (
+                session.query(IngestJob.batch_id).order_by(IngestJob.id.desc()).limit(1).scalar()
+            )
+        finally:
+            session.close()
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                ran = self._run_next()
+            except Exception as e:
+                logger.error(f"Ingest worker error: {str(e)}", exc_info=True)
+                ran = 0
+            if not ran:
+                self._wakeup.wait(self.poll_seconds)
+                self._wakeup.clear()
+
+    def _run_next(self):
+        """Claim and handle the next jobs; returns how many there were"""
+        jobs = self._claim()
+        if not jobs:
+            return 0
+        try:
+            outcomes = self.handler(jobs) or {}
+        except Exception as e:
+            logger.error(f"Ingest of {len(jobs)} jobs failed: {str(e)}", exc_info=True)
+            outcomes = {job["id"]: str(e) for job in jobs}
+        for job_id, outcome in outcomes.items():
+            status, message = outcome if isinstance(outcome, tuple) else ("failed", outcome)
+            self._finish([job_id], status, message)
+        self._finish([job["id"] for job in jobs if job["id"] not in outcomes], "done")
+        return len(jobs)
+
+    def _claim(self):
+        """Atomically move the oldest queued jobs to running and return them in queue order"""
+        next_ids = (
+            select(IngestJob.id)
+            .where(IngestJob.status == "queued")
+            .order_by(IngestJob.id)
+            .limit(self.claim_size)
+        )
+        session = self.session_factory()
+        try:
+            rows = session.execute(
+                update(IngestJob)
+                .where(IngestJob.id.in_(next_ids), IngestJob.status == "queued")
+                .values(
+                    status="running",
+                    attempts=IngestJob.attempts + 1,
+                    started_at=datetime.datetime.utcnow(),
+                )
+                .returning(
+                    IngestJob.id,
+                    IngestJob.batch_id,
+                    IngestJob.filename,
+                    IngestJob.content_hash,
+                    IngestJob.ocr_profile,
+                )
+            ).mappings().all()
+            session.commit()
+            return sorted((dict(row) for row in rows), key=lambda job: job["id"])
+        finally:
+            session.close()
+
+    def _finish(self, job_ids, status, error=None):
+        if not job_ids:
+            return
+        session = self.session_factory()
+        try:
+            session.execute(
+                update(IngestJob)
+                .where(IngestJob.id.in_(job_ids))
+                .values(status=status, error=error, finished_at=datetime.datetime.utcnow())
+            )
+            session.commit()
+        finally:
+            session.close()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_ingest_queue(handler):
+    """Return the process-wide job queue, creating and starting it on first use
+
+    Streamlit re-executes app.py on every interaction, so the queue lives here,
+    in an imported module, to get exactly one worker pool per process.
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = IngestJobQueue(handler)
+            _queue.start()
+        return _queue
@@ -0,0 +1,170 @@
+import logging
+import os
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Worker threads per stage. Extraction is mostly waiting on Tesseract
+# subprocesses and parsing is mostly Python holding the GIL, so extraction gets
+# more threads. Persisting always uses one thread, since SQLite has one writer.
+PIPELINE_EXTRACT_WORKERS = int(os.environ.get("PIPELINE_EXTRACT_WORKERS", "2"))
+PIPELINE_PARSE_WORKERS = int(os.environ.get("PIPELINE_PARSE_WORKERS", "1"))
+# Items allowed to wait between two stages before the upstream stage blocks.
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "8"))
+# Most items parsed or written in one call; a stage never waits to fill a batch.
+PIPELINE_BATCH_SIZE = 32
+
+_DONE = object()
+
+
+def run_ingest_pipeline(
+    items,
+    extract,
+    parse,
+    persist,
+    extract_workers=PIPELINE_EXTRACT_WORKERS,
+    parse_workers=PIPELINE_PARSE_WORKERS,
+    queue_size=PIPELINE_QUEUE_SIZE,
+    batch_size=PIPELINE_BATCH_SIZE,
+):
+    """Run items through extract -> parse -> persist stages that overlap in time
+
+    - ``extract(item)`` returns a record with "filename" and "raw_text" (None
+      when no text was found), plus any other columns to save.
+    - ``parse(texts)`` returns one parsed dict per text.
+    - ``persist(records)`` takes the extracted records merged with the parsed
+      fields and returns a dict like upsert_cv_documents does.
+
+    The stages are connected by bounded queues, so a slow stage holds back the
+    ones before it instead of letting work pile up in memory. Yields one
+    outcome dict per item, in completion order. Its ``status`` is
+    "inserted", "updated", "no_text" or "failed"; "failed" comes with an
+    ``error``. An item that fails to extract is reported under its "filename"
+    key or ``name`` attribute.
+    """
+    extract_workers = max(1, extract_workers)
+    parse_workers = max(1, parse_workers)
+    items_queue = queue.Queue()
+    texts_queue = queue.Queue(maxsize=queue_size)
+    records_queue = queue.Queue(maxsize=queue_size)
+    outcomes = queue.Queue()
+
+    for item in items:
+        items_queue.put(item)
+    for _ in range(extract_workers):
+        items_queue.put(_DONE)
+
+    def extract_stage():
+        while True:
+            item = items_queue.get()
+            if item is _DONE:
+                return
+            try:
+                record = extract(item)
+            except Exception as e:
+                logger.error(f"Extraction failed: {str(e)}", exc_info=True)
+                outcomes.put({"filename": _item_name(item), "status": "failed", "error": str(e)})
+                continue
+            if record.get("raw_text"):
+                texts_queue.put(record)
+            else:
+                outcomes.put({"filename": record["filename"], "status": "no_text", "error": None})
+
+    def parse_stage():
+        done = False
+        while not done:
+            batch, done = _take_batch(texts_queue, batch_size)
+            for record, parsed_data in _parse_isolated(parse, batch, outcomes):
+                parsed_data.pop("raw_text", None)
+                records_queue.put(dict(parsed_data, **record))
+
+    def persist_stage():
+        done = False
+        while not done:
+            batch, done = _take_batch(records_queue, batch_size)
+            if not batch:
+                continue
+            try:
+                result = persist(batch)
+            except Exception as e:
+                logger.error(f"Saving {len(batch)} CVs failed: {str(e)}", exc_info=True)
+                result = {"failed": {record["filename"]: str(e) for record in batch}}
+            for filename in result.get("inserted", []):
+                outcomes.put({"filename": filename, "status": "inserted", "error": None})
+            for filename in result.get("updated", []):
+                outcomes.put({"filename": filename, "status": "updated", "error": None})
+            for filename, error in result.get("failed", {}).items():
+                outcomes.put({"filename": filename, "status": "failed", "error": error})
+
+    _start_stage("extract", extract_stage, extract_workers, texts_queue, parse_workers)
+    _start_stage("parse", parse_stage, parse_workers, records_queue, 1)
+    _start_stage("persist", persist_stage, 1, outcomes, 1)
+
+    while True:
+        outcome = outcomes.get()
+        if outcome is _DONE:
+            return
+        yield outcome
+
+
+def _item_name(item):
+    if isinstance(item, dict):
+        return item.get("filename", str(item))
+    return getattr(item, "name", str(item))
+
+
+def _start_stage(name, work, workers, outbox, downstream_workers):
+    """Start a stage's threads; once all have finished, tell each downstream worker"""
+    threads = [
+        threading.Thread(target=work, name=f"ingest-{name}-{number}", daemon=True)
+        for number in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    def close():
+        for thread in threads:
+            thread.join()
+        for _ in range(downstream_workers):
+            outbox.put(_DONE)
+
+    threading.Thread(target=close, name=f"ingest-{name}-close", daemon=True).start()
+
+
+def _take_batch(inbox, batch_size):
+    """Wait for one item, then take whatever else is already queued, up to batch_size
+
+    Returns ``(batch, done)``; done is True once the upstream stage has finished.
+    """
+    item = inbox.get()
+    if item is _DONE:
+        return [], True
+    batch = [item]
+    while len(batch) < batch_size:
+        try:
+            item = inbox.get_nowait()
+        except queue.Empty:
+            break
+        if item is _DONE:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+
+def _parse_isolated(parse, batch, outcomes):
+    """Parse a batch, falling back to one text at a time so one bad CV only fails itself"""
+    if not batch:
+        return []
+    try:
+        return list(zip(batch, parse([record["raw_text"] for record in batch])))
+    except Exception as e:
+        if len(batch) == 1:
+            filename = batch[0]["filename"]
+            logger.error(f"Parsing {filename} failed: {str(e)}", exc_info=True)
+            outcomes.put({"filename": filename, "status": "failed", "error": str(e)})
+            return []
+    parsed = []
+    for item in batch:
+        parsed.extend(_parse_isolated(parse, [item], outcomes))
+    return parsed
@@ -1,18 +1,74 @@
 import io
+import os
+from concurrent.futures import ThreadPoolExecutor
 import pytesseract
-from pdf2image import convert_from_bytes
+from pdf2image import convert_from_bytes, pdfinfo_from_bytes
+from PyPDF2 import PdfReader
 import magic
 import docx
 import logging
 
 logger = logging.getLogger(__name__)
 
+# A page's embedded text is only trusted when it has at least this many
+# non-whitespace characters and enough of them are ordinary readable text.
+# Scanned pages usually have no text layer at all, and broken font encodings
+# produce runs of symbols that are better handled by OCR.
+TEXT_LAYER_MIN_CHARS = 40
+TEXT_LAYER_MIN_QUALITY = 0.75
 
-def extract_text_from_file(file_bytes, file_type):
-    """Extract text from various file formats"""
+# Number of pages OCR'd concurrently. Tesseract runs as a subprocess, so a
+# thread pool is enough to keep several cores busy. Defaults to the CPU count.
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", "0")) or None
+
+# Pages are rendered a few at a time instead of rasterizing the whole document
+# up front. MAX_PDF_PAGES caps how many pages of one PDF are extracted, and
+# MAX_PAGE_PIXELS lowers the DPI of oversized pages so a single render stays bounded.
+PDF_RENDER_WINDOW = 1
+MAX_PDF_PAGES = int(os.environ.get("MAX_PDF_PAGES", "0")) or None
+MAX_PAGE_PIXELS = int(os.environ.get("MAX_PAGE_PIXELS", "25000000"))
+
+# OpenMP threads per Tesseract process. Pages already run in parallel, so one
+# thread each avoids oversubscribing the CPU. Tesseract reads OMP_THREAD_LIMIT
+# from the environment it inherits, which is shared by the whole process, so
+# this is set once at import and is not a per-profile setting.
+TESSERACT_THREADS = int(os.environ.get("TESSERACT_THREADS", "1"))
+os.environ.setdefault("OMP_THREAD_LIMIT", str(TESSERACT_THREADS))
+
+# Named speed/accuracy trade-offs for rendering and Tesseract. The adaptive
+# profile OCRs at low DPI and re-renders a page at retry_dpi only when the mean
+# word confidence is below min_confidence.
+OCR_PROFILES = {
+    "fast": {"dpi": 150, "grayscale": True, "oem": 1, "psm": 6},
+    "balanced": {"dpi": 200, "grayscale": True, "oem": 1, "psm": 3},
+    "accurate": {"dpi": 300, "grayscale": False, "oem": 1, "psm": 3},
+    "adaptive": {
+        "dpi": 150,
+        "grayscale": True,
+        "oem": 1,
+        "psm": 3,
+        "retry_dpi": 300,
+        "min_confidence": 70,
+    },
+}
+DEFAULT_OCR_PROFILE = os.environ.get("OCR_PROFILE", "balanced")
+
+# MIME types extract_text_from_file can handle.
+SUPPORTED_FILE_TYPES = (
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "text/plain",
+)
+
+
+def extract_text_from_file(file_bytes, file_type, ocr_profile=None, ocr_workers=None):
+    """Extract text from various file formats
+
+    ``ocr_workers`` caps the threads that OCR a scanned PDF, see resolve_ocr_workers.
+    """
     try:
         if file_type == "application/pdf":
-            return extract_text_from_pdf(file_bytes)
+            return extract_text_from_pdf(file_bytes, workers=ocr_workers, profile=ocr_profile)
         elif (
             file_type
             == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
@@ -28,16 +84,312 @@ def extract_text_from_file(file_bytes, file_type):
         return None
 
 
-def extract_text_from_pdf(file_bytes):
-    """Extract text from PDF using OCR"""
-    images = convert_from_bytes(file_bytes)
-    text = ""
-    for i, image in enumerate(images):
-        page_text = pytesseract.image_to_string(image)
-        text += f"\n--- Page {i+1} ---\n{page_text}"
+def extraction_settings(ocr_profile=None):
+    """Return the settings that affect extracted text, used to key cached extractions"""
+    return {
+        "text_layer_min_chars": TEXT_LAYER_MIN_CHARS,
+        "text_layer_min_quality": TEXT_LAYER_MIN_QUALITY,
+        "ocr_profile": resolve_ocr_profile(ocr_profile),
+        "max_pdf_pages": MAX_PDF_PAGES,
+        "max_page_pixels": MAX_PAGE_PIXELS,
+    }
+
+
+def resolve_ocr_profile(profile=None):
+    """Return the settings dict for a profile name, or the default profile if None"""
+    if isinstance(profile, dict):
+        return profile
+    name = profile or DEFAULT_OCR_PROFILE
+    if name not in OCR_PROFILES:
+        raise ValueError(f"Unknown OCR profile: {name}")
+    return {"name": name, **OCR_PROFILES[name]}
+
+
+def tesseract_config(profile):
+    """Build the Tesseract command line options for a profile"""
+    return f"--oem {profile['oem']} --psm {profile['psm']}"
+
+
+def extract_text_from_pdf(file_bytes, use_text_layer=True, workers=None, profile=None):
+    """Extract text from PDF, using the embedded text layer where possible and OCR otherwise"""
+    text, _ = extract_text_from_pdf_with_report(
+        file_bytes, use_text_layer=use_text_layer, workers=workers, profile=profile
+    )
     return text
 
 
+def extract_text_from_pdf_with_report(
+    file_bytes, use_text_layer=True, workers=None, max_pages=None, max_pixels=None, profile=None
+):
+    """Extract text from PDF and report which extraction path was taken for each page
+
+    Returns a ``(text, report)`` tuple. ``report["methods"]`` holds ``"text_layer"``
+    or ``"ocr"`` for every page, in page order. Pages that need OCR are spread over
+    ``workers`` threads (``OCR_WORKERS`` or the CPU count by default). Each page is
+    rendered only when it is about to be OCR'd, so memory does not grow with page count.
+    """
+    max_pages = max_pages or MAX_PDF_PAGES
+    max_pixels = max_pixels or MAX_PAGE_PIXELS
+    profile = resolve_ocr_profile(profile)
+    reader = _open_pdf(file_bytes)
+
+    layer_pages = extract_text_layer(file_bytes, reader) if use_text_layer else None
+    if layer_pages:
+        page_count = len(layer_pages)
+    else:
+        page_count = count_pdf_pages(file_bytes, reader)
+        layer_pages = [""] * page_count
+
+    if max_pages and page_count > max_pages:
+        logger.warning(f"PDF has {page_count} pages, only the first {max_pages} will be extracted")
+        layer_pages = layer_pages[:max_pages]
+
+    methods = [
+        "text_layer" if use_text_layer and is_usable_text_layer(t) else "ocr" for t in layer_pages
+    ]
+    ocr_page_numbers = [i + 1 for i, method in enumerate(methods) if method == "ocr"]
+    ocr_texts = _ocr_pages(file_bytes, ocr_page_numbers, workers, reader, max_pixels, profile)
+
+    pages = list(layer_pages)
+    for page_number, page_text in zip(ocr_page_numbers, ocr_texts):
+        pages[page_number - 1] = page_text
+
+    text = "".join(f"\n--- Page {i+1} ---\n{page_text}" for i, page_text in enumerate(pages))
+    report = {
+        "page_count": page_count,
+        "methods": methods,
+        "text_layer_pages": methods.count("text_layer"),
+        "ocr_pages": methods.count("ocr"),
+        "truncated": len(pages) < page_count,
+        "ocr_profile": profile.get("name"),
+    }
+    logger.info(
+        f"PDF extraction: {report['text_layer_pages']} text-layer page(s), "
+        f"{report['ocr_pages']} OCR page(s)"
+    )
+    return text, report
+
+
+def iter_ocr_pages(
+    file_bytes,
+    page_numbers=None,
+    window=PDF_RENDER_WINDOW,
+    profile=None,
+    max_pages=None,
+    max_pixels=None,
+    reader=None,
+    page_sizes=None,
+):
+    """Rasterize and OCR PDF pages a small window at a time
+
+    Yields ``(page_number, text)`` in page order. At most ``window`` page images are
+    alive at once and each one is closed as soon as it has been OCR'd.
+    """
+    profile = resolve_ocr_profile(profile)
+    max_pixels = max_pixels or MAX_PAGE_PIXELS
+    if page_numbers is None or page_sizes is None:
+        reader = reader or _open_pdf(file_bytes)
+    if page_numbers is None:
+        page_count = count_pdf_pages(file_bytes, reader)
+        max_pages = max_pages or MAX_PDF_PAGES
+        if max_pages and page_count > max_pages:
+            logger.warning(f"PDF has {page_count} pages, only the first {max_pages} will be OCR'd")
+            page_count = max_pages
+        page_numbers = range(1, page_count + 1)
+
+    if page_sizes is None:
+        page_sizes = _page_sizes(reader)
+    for first_page, last_page in _page_windows(page_numbers, window):
+        window_dpi = min(
+            _render_dpi(page_sizes.get(n), profile["dpi"], max_pixels)
+            for n in range(first_page, last_page + 1)
+        )
+        images = convert_from_bytes(
+            file_bytes,
+            dpi=window_dpi,
+            first_page=first_page,
+            last_page=last_page,
+            grayscale=profile["grayscale"],
+        )
+        for page_number, image in zip(range(first_page, last_page + 1), images):
+            try:
+                yield page_number, _ocr_image(
+                    file_bytes, page_number, image, profile, page_sizes, max_pixels
+                )
+            finally:
+                image.close()
+        del images
+
+
+def extract_text_layer(file_bytes, reader=None):
+    """Return the embedded text of each PDF page, or None if the PDF cannot be read"""
+    try:
+        reader = reader or PdfReader(io.BytesIO(file_bytes))
+        return [page.extract_text() or "" for page in reader.pages]
+    except Exception as e:
+        logger.debug(f"Could not read PDF text layer: {str(e)}")
+        return None
+
+
+def count_pdf_pages(file_bytes, reader=None):
+    """Return the number of pages in a PDF without rendering any of them"""
+    if reader is not None:
+        return len(reader.pages)
+    return int(pdfinfo_from_bytes(file_bytes)["Pages"])
+
+
+def is_usable_text_layer(page_text, min_chars=TEXT_LAYER_MIN_CHARS, min_quality=TEXT_LAYER_MIN_QUALITY):
+    """Check whether embedded page text is complete enough to skip OCR"""
+    chars = [c for c in page_text if not c.isspace()]
+    if len(chars) < min_chars:
+        return False
+    readable = sum(1 for c in chars if c.isalnum() or c in ".,;:()-/@+&'\"|•%#")
+    return readable / len(chars) >= min_quality
+
+
+def resolve_ocr_workers(workers=None):
+    """Return how many pages to OCR at once; 1 means serial"""
+    if workers is None:
+        workers = OCR_WORKERS or os.cpu_count() or 1
+    return max(1, workers)
+
+
+def _ocr_pages(file_bytes, page_numbers, workers, reader, max_pixels, profile):
+    """OCR the given pages, in parallel when there is more than one core to use
+
+    Results are returned in the same order as ``page_numbers``.
+    """
+    workers = min(resolve_ocr_workers(workers), len(page_numbers))
+    page_sizes = _page_sizes(reader)
+    if workers <= 1:
+        return [
+            text
+            for _, text in iter_ocr_pages(
+                file_bytes,
+                page_numbers,
+                profile=profile,
+                max_pixels=max_pixels,
+                page_sizes=page_sizes,
+            )
+        ]
+
+    def ocr_page(page_number):
+        return next(
+            iter_ocr_pages(
+                file_bytes,
+                [page_number],
+                profile=profile,
+                max_pixels=max_pixels,
+                page_sizes=page_sizes,
+            )
+        )[1]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(ocr_page, page_numbers))
+
+
+def _ocr_image(file_bytes, page_number, image, profile, page_sizes, max_pixels):
+    """OCR one rendered page, re-rendering it at a higher DPI if confidence is poor"""
+    config = tesseract_config(profile)
+    min_confidence = profile.get("min_confidence")
+    if not min_confidence:
+        return pytesseract.image_to_string(image, config=config)
+
+    text, confidence = _ocr_with_confidence(image, config)
+    if confidence >= min_confidence:
+        return text
+
+    retry_dpi = _render_dpi(page_sizes.get(page_number), profile["retry_dpi"], max_pixels)
+    logger.info(
+        f"Page {page_number} OCR confidence {confidence:.0f} is below {min_confidence}, "
+        f"re-rendering at {retry_dpi} DPI"
+    )
+    retry_images = convert_from_bytes(
+        file_bytes,
+        dpi=retry_dpi,
+        first_page=page_number,
+        last_page=page_number,
+        grayscale=profile["grayscale"],
+    )
+    try:
+        retry_text, retry_confidence = _ocr_with_confidence(retry_images[0], config)
+    finally:
+        for retry_image in retry_images:
+            retry_image.close()
+    return retry_text if retry_confidence >= confidence else text
+
+
+def _ocr_with_confidence(image, config):
+    """OCR an image and return its text with the mean word confidence (0-100)"""
+    data = pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
+    lines = {}
+    confidences = []
+    for i, word in enumerate(data["text"]):
+        confidence = float(data["conf"][i])
+        if confidence < 0 or not word.strip():
+            continue
+        confidences.append(confidence)
+        line_key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        lines.setdefault(line_key, []).append(word)
+
+    text_lines = []
+    previous_paragraph = None
+    for (block, paragraph, _), words in lines.items():
+        if previous_paragraph is not None and (block, paragraph) != previous_paragraph:
+            text_lines.append("")
+        text_lines.append(" ".join(words))
+        previous_paragraph = (block, paragraph)
+
+    mean_confidence = sum(confidences) / len(confidences) if confidences else 0.0
+    return "\n".join(text_lines), mean_confidence
+
+
+def _open_pdf(file_bytes):
+    try:
+        return PdfReader(io.BytesIO(file_bytes))
+    except Exception as e:
+        logger.debug(f"Could not open PDF with PyPDF2: {str(e)}")
+        return None
+
+
+def _page_sizes(reader):
+    """Map page numbers to their (width, height) in points, where the PDF can be read"""
+    if reader is None:
+        return {}
+    try:
+        return {
+            i: (float(page.mediabox.width), float(page.mediabox.height))
+            for i, page in enumerate(reader.pages, 1)
+        }
+    except Exception:
+        return {}
+
+
+def _render_dpi(page_size, dpi, max_pixels):
+    """Lower the render DPI for oversized pages so one page never exceeds max_pixels"""
+    if not page_size or not max_pixels:
+        return dpi
+    width, height = page_size
+    pixels = (width * dpi / 72) * (height * dpi / 72)
+    if pixels <= max_pixels:
+        return dpi
+    return max(1, int(dpi * (max_pixels / pixels) ** 0.5))
+
+
+def _page_windows(page_numbers, window):
+    """Group page numbers into contiguous (first_page, last_page) runs of at most window pages"""
+    run_start = run_end = None
+    for page_number in page_numbers:
+        if run_start is not None and page_number == run_end + 1 and page_number - run_start < window:
+            run_end = page_number
+            continue
+        if run_start is not None:
+            yield run_start, run_end
+        run_start = run_end = page_number
+    if run_start is not None:
+        yield run_start, run_end
+
+
 def extract_text_from_docx(file_bytes):
     """Extract text from DOCX files"""
     doc = docx.Document(io.BytesIO(file_bytes))
@@ -0,0 +1,166 @@
+"""Re-parse stored CVs whose sections came from an older parser version.
+
+Usage: python reparse.py [--chunk-size N] [--upgrade-lite]
+
+Only the stored raw_text is parsed again, so no file is opened and nothing is
+OCRed twice. Stale CVs are read in id order, a chunk at a time, and each chunk
+is written back with the current PARSER_VERSION as soon as it is parsed, so an
+interrupted run carries on where it stopped when started again.
+
+With --upgrade-lite, CVs saved by the regex-only "lite" parse mode are
+re-parsed as well, in CV_PARSE_MODE or, if that is lite too, in full mode.
+"""
+import argparse
+import datetime
+import logging
+import time
+
+from sqlalchemy import bindparam, or_, update
+
+from cv_parser import PARSER_VERSION, GenericCVParser
+from database import Base, CVDocument, Session, engine
+
+logger = logging.getLogger(__name__)
+
+REPARSE_CHUNK_SIZE = 200
+SECTION_COLUMNS = [
+    "personal_info",
+    "education",
+    "work_experience",
+    "skills",
+    "projects",
+    "certifications",
+]
+
+
+def is_stale(parser_version=PARSER_VERSION, upgrade_lite=False):
+    """Filter for CVs that can be re-parsed and were parsed by an older parser
+
+    With upgrade_lite, CVs parsed in lite mode count as stale too.
+    """
+    conditions = [CVDocument.parser_version.is_(None), CVDocument.parser_version < parser_version]
+    if upgrade_lite:
+        conditions.append(CVDocument.parse_mode == "lite")
+    return CVDocument.raw_text.isnot(None) & or_(*conditions)
+
+
+def count_stale(session, parser_version=PARSER_VERSION, upgrade_lite=False):
+    return session.query(CVDocument.id).filter(is_stale(parser_version, upgrade_lite)).count()
+
+
+def run_reparse(
+    chunk_size=REPARSE_CHUNK_SIZE,
+    parser=None,
+    parser_version=PARSER_VERSION,
+    session_factory=Session,
+    progress=None,
+    upgrade_lite=False,
+):
+    """Re-parse every stale CV and return counters
+
+    ``progress(done, total)`` is called after each chunk. CVs that fail to
+    parse keep their old sections and version, so the next run tries them again.
+    """
+    started = time.perf_counter()
+    parser = parser or GenericCVParser()
+    if upgrade_lite and parser.mode == "lite":
+        raise ValueError("Upgrading lite CVs needs a parser that is not in lite mode")
+    stale = is_stale(parser_version, upgrade_lite)
+    stats = {"total": 0, "reparsed": 0, "failed": 0, "seconds": 0.0}
+    session = session_factory()
+    try:
+        stats["total"] = count_stale(session, parser_version, upgrade_lite)
+        after_id = 0
+        while True:
+            rows = (
+                session.query(CVDocument.id, CVDocument.filename, CVDocument.raw_text)
+                .filter(CVDocument.id > after_id, stale)
+                .order_by(CVDocument.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not rows:
+                break
+            after_id = rows[-1].id
+            updates = [
+                dict({f"new_{column}": parsed_data.get(column) for column in SECTION_COLUMNS}, cv_id=row.id)
+                for row, parsed_data in zip(rows, _parse_chunk(parser, rows))
+                if parsed_data is not None
+            ]
+            if updates:
+                _save_chunk(session, updates, stale, parser_version, parser.mode)
+            stats["reparsed"] += len(updates)
+            stats["failed"] += len(rows) - len(updates)
+            if progress:
+                progress(stats["reparsed"] + stats["failed"], stats["total"])
+    finally:
+        session.close()
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def _parse_chunk(parser, rows):
+    """Parse a chunk with parse_many, falling back to one CV at a time if that fails
+
+    Returns one parsed dict per row, or None for a row that could not be parsed.
+    """
+    try:
+        return list(parser.parse_many([row.raw_text for row in rows]))
+    except Exception as e:
+        logger.warning(f"Re-parsing {len(rows)} CVs failed, retrying one by one: {str(e)}")
+    results = []
+    for row in rows:
+        try:
+            results.append(parser.parse(row.raw_text))
+        except Exception as e:
+            logger.error(f"Could not re-parse {row.filename}: {str(e)}", exc_info=True)
+            results.append(None)
+    return results
+
+
+def _save_chunk(session, updates, stale, parser_version, parse_mode):
+    # A CV saved by a current parser since the chunk was read keeps that result.
+    statement = (
+        update(CVDocument.__table__)
+        .where(CVDocument.id == bindparam("cv_id"), stale)
+        .values(
+            dict(
+                {column: bindparam(f"new_{column}") for column in SECTION_COLUMNS},
+                parser_version=parser_version,
+                parse_mode=parse_mode,
+                updated_at=datetime.datetime.utcnow(),
+            )
+        )
+    )
+    session.execute(statement, updates)
+    session.commit()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--chunk-size", type=int, default=REPARSE_CHUNK_SIZE)
+    arg_parser.add_argument(
+        "--upgrade-lite", action="store_true", help="also re-parse CVs saved by the lite parse mode"
+    )
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    Base.metadata.create_all(engine)
+
+    def progress(done, total):
+        print(f"Re-parsed {done}/{total} CVs", flush=True)
+
+    parser = GenericCVParser()
+    if args.upgrade_lite and parser.mode == "lite":
+        parser = GenericCVParser(mode="full")
+    stats = run_reparse(
+        chunk_size=args.chunk_size, parser=parser, progress=progress, upgrade_lite=args.upgrade_lite
+    )
+    print(
+        f"Re-parsed {stats['reparsed']} of {stats['total']} stale CVs to parser version "
+        f"{PARSER_VERSION} in {stats['seconds']:.1f}s, {stats['failed']} failed"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import logging
+import re
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Sections of CVDocument that are indexed next to raw_text. Their JSON is
+# flattened to the string values only, so keys like "degree" are not searchable.
+SEARCH_SECTIONS = [
+    "personal_info",
+    "education",
+    "work_experience",
+    "skills",
+    "projects",
+    "certifications",
+]
+SEARCH_COLUMNS = ["filename", "raw_text"] + SEARCH_SECTIONS
+SEARCH_RESULT_LIMIT = 50
+
+
+def _flatten(row_alias, column):
+    return (
+        f"(SELECT group_concat(value, ' ') FROM json_tree({row_alias}.{column}) "
+        f"WHERE type = 'text')"
+    )
+
+
+def _filenames(row_alias):
+    """The CV's filename followed by any aliases recorded for its content"""
+    return (
+        f"{row_alias}.filename || coalesce(' ' || (SELECT group_concat(a.filename, ' ') "
+        f"FROM cv_aliases AS a WHERE a.content_hash = {row_alias}.content_hash), '')"
+    )
+
+
+def _insert_from(row_alias, source=None):
+    """INSERT INTO cv_search built from a cv_documents row (a trigger row or a SELECT)"""
+    values = ", ".join(
+        [f"{row_alias}.id", _filenames(row_alias), f"{row_alias}.raw_text"]
+        + [_flatten(row_alias, section) for section in SEARCH_SECTIONS]
+    )
+    statement = f"INSERT INTO cv_search(rowid, {', '.join(SEARCH_COLUMNS)}) "
+    if source is None:
+        return statement + f"VALUES ({values})"
+    return statement + f"SELECT {values} FROM {source}"
+
+
+SEARCH_TRIGGERS = [
+    "cv_documents_search_insert",
+    "cv_documents_search_delete",
+    "cv_documents_search_update",
+    "cv_aliases_search_insert",
+]
+
+# Triggers are dropped and created again every time, so databases created by
+# an older version pick up changes to their bodies.
+SEARCH_INDEX_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS cv_search USING fts5(
+        {', '.join(SEARCH_COLUMNS)},
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )""",
+] + [f"DROP TRIGGER IF EXISTS {trigger}" for trigger in SEARCH_TRIGGERS] + [
+    f"""CREATE TRIGGER cv_documents_search_insert
+        AFTER INSERT ON cv_documents BEGIN
+            {_insert_from("new")};
+        END""",
+    """CREATE TRIGGER cv_documents_search_delete
+        AFTER DELETE ON cv_documents BEGIN
+            DELETE FROM cv_search WHERE rowid = old.id;
+        END""",
+    f"""CREATE TRIGGER cv_documents_search_update
+        AFTER UPDATE ON cv_documents BEGIN
+            DELETE FROM cv_search WHERE rowid = old.id;
+            {_insert_from("new")};
+        END""",
+    # Touching the CV re-indexes it through the update trigger and bumps the
+    # database generation, so cached searches see the new alias.
+    """CREATE TRIGGER cv_aliases_search_insert
+        AFTER INSERT ON cv_aliases BEGIN
+            UPDATE cv_documents SET updated_at = updated_at WHERE content_hash = new.content_hash;
+        END""",
+]
+
+
+def create_search_index(connection):
+    """Create the FTS5 table and sync triggers, and index rows that predate them"""
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in SEARCH_INDEX_DDL:
+        connection.execute(text(statement))
+    backfilled = connection.execute(
+        text(
+            _insert_from(
+                "d", "cv_documents AS d WHERE d.id NOT IN (SELECT rowid FROM cv_search)"
+            )
+        )
+    ).rowcount
+    if backfilled:
+        logger.info(f"Indexed {backfilled} existing CVs for full-text search")
+
+
+def drop_search_index(connection):
+    """Drop the FTS5 table; its triggers go away with cv_documents"""
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DROP TABLE IF EXISTS cv_search"))
+
+
+def build_match_query(query, column=None):
+    """Turn free text into an FTS5 MATCH expression of prefix terms, all required
+
+    Returns None when the query has nothing searchable in it.
+    """
+    terms = re.findall(r"\w+", query.lower())
+    if not terms:
+        return None
+    expression = " ".join(f'"{term}"*' for term in terms)
+    if column:
+        if column not in SEARCH_COLUMNS:
+            raise ValueError(f"Unknown search column: {column}")
+        expression = f"{{{column}}} : ({expression})"
+    return expression
+
+
+def search_cvs(session, query, column=None, limit=SEARCH_RESULT_LIMIT):
+    """Full-text search over CVs, best matches first
+
+    Returns a list of dicts with id, filename, content_hash, rank and a
+    highlighted snippet.
+    """
+    match_query = build_match_query(query, column)
+    if match_query is None:
+        return []
+    snippet_column = SEARCH_COLUMNS.index(column) if column else -1
+    rows = session.execute(
+        text(
+            "SELECT cv_search.rowid, d.filename, d.content_hash, cv_search.rank, "
+            "snippet(cv_search, :snippet_column, '**', '**', '…', 12) "
+            "FROM cv_search JOIN cv_documents AS d ON d.id = cv_search.rowid "
+            "WHERE cv_search MATCH :match_query "
+            "ORDER BY cv_search.rank LIMIT :limit"
+        ),
+        {"match_query": match_query, "snippet_column": snippet_column, "limit": limit},
+    )
+    return [
+        {
+            "id": row[0],
+            "filename": row[1],
+            "content_hash": row[2],
+            "rank": row[3],
+            "snippet": row[4],
+        }
+        for row in rows
+    ]
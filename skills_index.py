@@ -0,0 +1,117 @@
+import logging
+import re
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# CVDocument.skills is normally a JSON list of strings, but older rows may hold
+# {"skills": [...]}. Skills are matched case-insensitively on lower(trim(skill)).
+_SKILLS_ARRAY = (
+    "CASE json_type({row}.skills) WHEN 'object' THEN json_extract({row}.skills, '$.skills') "
+    "ELSE {row}.skills END"
+)
+
+
+def _insert_from(row_alias, source=None, where=None):
+    """INSERT INTO cv_skills for the skills of a cv_documents row (a trigger row or a SELECT)"""
+    skills = f"json_each({_SKILLS_ARRAY.format(row=row_alias)}) AS skill"
+    conditions = ["skill.type = 'text'", "trim(skill.value) != ''"] + ([where] if where else [])
+    return (
+        "INSERT OR IGNORE INTO cv_skills(cv_id, skill_normalized, skill_raw) "
+        f"SELECT {row_alias}.id, lower(trim(skill.value)), trim(skill.value) "
+        f"FROM {f'{source}, ' if source else ''}{skills} "
+        f"WHERE {' AND '.join(conditions)}"
+    )
+
+
+SKILLS_INDEX_DDL = [
+    f"""CREATE TRIGGER IF NOT EXISTS cv_documents_skills_insert
+        AFTER INSERT ON cv_documents BEGIN
+            {_insert_from("new")};
+        END""",
+    """CREATE TRIGGER IF NOT EXISTS cv_documents_skills_delete
+        AFTER DELETE ON cv_documents BEGIN
+            DELETE FROM cv_skills WHERE cv_id = old.id;
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS cv_documents_skills_update
+        AFTER UPDATE OF skills ON cv_documents BEGIN
+            DELETE FROM cv_skills WHERE cv_id = old.id;
+            {_insert_from("new")};
+        END""",
+]
+
+
+def create_skills_index(connection):
+    """Create the cv_skills sync triggers and backfill skills of CVs not yet indexed"""
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in SKILLS_INDEX_DDL:
+        connection.execute(text(statement))
+    backfilled = connection.execute(
+        text(
+            _insert_from(
+                "d", "cv_documents AS d", where="d.id NOT IN (SELECT cv_id FROM cv_skills)"
+            )
+        )
+    ).rowcount
+    if backfilled:
+        logger.info(f"Indexed {backfilled} skills of existing CVs")
+
+
+def parse_skill_filter(query):
+    """Split a filter like "has Python AND Docker" or "python, docker" into skill names"""
+    parts = re.split(r",|&|\band\b", query, flags=re.IGNORECASE)
+    skills = []
+    for part in parts:
+        part = re.sub(r"^\s*(?:has|with)\b", "", part, flags=re.IGNORECASE).strip()
+        if part:
+            skills.append(part)
+    return skills
+
+
+def find_cvs_with_skills(session, skills, limit=None):
+    """Return CVs that have every one of the given skills
+
+    Each result is a dict with id, filename, content_hash and the matched skills as a snippet.
+    """
+    wanted = sorted({skill.strip().lower(): skill.strip() for skill in skills if skill.strip()}.values())
+    if not wanted:
+        return []
+    placeholders = ", ".join(f"lower(:skill_{i})" for i in range(len(wanted)))
+    params = {f"skill_{i}": skill for i, skill in enumerate(wanted)}
+    params["skill_count"] = len(wanted)
+    params["limit"] = limit or -1
+    rows = session.execute(
+        text(
+            "SELECT s.cv_id, d.filename, d.content_hash, group_concat(s.skill_raw, ', ') "
+            "FROM cv_skills AS s JOIN cv_documents AS d ON d.id = s.cv_id "
+            f"WHERE s.skill_normalized IN ({placeholders}) "
+            "GROUP BY s.cv_id HAVING count(*) = :skill_count "
+            "ORDER BY s.cv_id LIMIT :limit"
+        ),
+        params,
+    )
+    return [
+        {
+            "id": cv_id,
+            "filename": filename,
+            "content_hash": digest,
+            "rank": None,
+            "snippet": matched,
+        }
+        for cv_id, filename, digest, matched in rows
+    ]
+
+
+def skill_distribution(session, limit=None):
+    """Return (skill, CV count) pairs, most common first, counted with the cv_skills index"""
+    rows = session.execute(
+        text(
+            "SELECT min(skill_raw), count(*) AS cv_count FROM cv_skills "
+            "GROUP BY skill_normalized ORDER BY cv_count DESC, skill_normalized "
+            "LIMIT :limit"
+        ),
+        {"limit": limit or -1},
+    )
+    return [(skill, count) for skill, count in rows]
@@ -9,7 +9,8 @@ import json
 from database import Base, CVDocument, Session, engine
 from cv_parser import GenericCVParser
 from ocr_processor import extract_text_from_file
-from app import process_uploaded_files, chat_interface
+from app import ingest_stored_files, chat_interface
+from file_store import FileStore
 
 class IntegrationTests(unittest.TestCase):
     def setUp(self):
@@ -60,24 +61,20 @@ class IntegrationTests(unittest.TestCase):
     
     @patch("app.extract_text_from_file")
     @patch("app.magic.from_buffer")
-    @patch("streamlit.success")
-    @patch("streamlit.error")
-    def test_end_to_end_cv_processing(self, mock_error, mock_success, mock_from_buffer, mock_extract_text):
-        """Test the complete flow of uploading, processing, and querying a CV"""
+    def test_end_to_end_cv_processing(self, mock_from_buffer, mock_extract_text):
+        """Test the complete flow of storing, ingesting, and querying a CV"""
 
-        mock_file = MagicMock()
-        mock_file.name = "sample_cv.pdf"
+        store = FileStore(self.test_upload_dir)
         with open(self.sample_pdf_path, "rb") as f:
-            file_content = f.read()
-        mock_file.getvalue.return_value = file_content
+            digest = store.put(f.read())
+        job = {"id": 1, "batch_id": "b1", "filename": "sample_cv.pdf", "content_hash": digest,
+               "ocr_profile": None}
         
         mock_from_buffer.return_value = "application/pdf"
         mock_extract_text.return_value = self.sample_cv_text
         
-        process_uploaded_files([mock_file])
-        
-        mock_success.assert_called()
-        mock_error.assert_not_called()
+        with patch("app.upload_store", store):
+            self.assertEqual(ingest_stored_files([job]), {})
         
         session = Session()
         try:
@@ -1,9 +1,13 @@
 import unittest
 from unittest.mock import patch, MagicMock
+import base64
+import hashlib
 import os
 import tempfile
 import streamlit as st
-from app import process_uploaded_files, chat_interface, cv_organizer_and_viewer
+import app
+from app import chat_interface, cv_organizer_and_viewer, read_upload_bytes
+from file_store import FileStore, RecentFiles
 
 class TestApp(unittest.TestCase):
     
@@ -11,109 +15,162 @@ class TestApp(unittest.TestCase):
         self.temp_dir = tempfile.TemporaryDirectory()
         self.original_upload_dir = os.environ.get('UPLOAD_DIR', None)
         os.environ['UPLOAD_DIR'] = self.temp_dir.name
+        # Parsers and search results are cached per process; keep tests independent.
+        app.get_parser.clear()
+        app.get_recent_files.clear()
+        st.cache_data.clear()
+        self.known_content = {}
+        known_patcher = patch('app.find_known_content', side_effect=lambda session, hashes: {
+            digest: name for digest, name in self.known_content.items() if digest in hashes
+        })
+        self.mock_find_known_content = known_patcher.start()
+        self.addCleanup(known_patcher.stop)
+        aliases_patcher = patch('app.add_cv_aliases')
+        self.mock_add_cv_aliases = aliases_patcher.start()
+        self.addCleanup(aliases_patcher.stop)
         
     def tearDown(self):
         self.temp_dir.cleanup()
+        app.get_parser.clear()
+        app.get_recent_files.clear()
+        st.cache_data.clear()
         if self.original_upload_dir:
             os.environ['UPLOAD_DIR'] = self.original_upload_dir
         else:
             os.environ.pop('UPLOAD_DIR', None)
             
+    def make_jobs(self, contents, ocr_profile=None):
+        """Store each file like queue_uploaded_files does and return its ingest jobs"""
+        store = FileStore(self.temp_dir.name)
+        jobs = []
+        for number, (name, content) in enumerate(contents, 1):
+            jobs.append({"id": number, "batch_id": "b1", "filename": name,
+                         "content_hash": store.put(content), "ocr_profile": ocr_profile})
+        return store, jobs
+
+    @patch('app.extraction_cache')
     @patch('app.GenericCVParser')
     @patch('app.extract_text_from_file')
-    @patch('app.Session')
+    @patch('app.upsert_cv_documents')
     @patch('app.magic.from_buffer')
-    @patch('streamlit.success')
-    @patch('streamlit.error')
-    @patch('streamlit.warning')
-    def test_process_uploaded_files_success(self, mock_warning, mock_error, mock_success, 
-    mock_from_buffer, mock_session, mock_extract_text, 
-    mock_parser_class):
-
-        mock_file = MagicMock()
-        mock_file.name = "test_cv.pdf"
-        mock_file.getvalue.return_value = b"file content"
-
-        mock_session_instance = MagicMock()
-        mock_session.return_value = mock_session_instance
-        mock_session_instance.query.return_value.filter_by.return_value.first.return_value = None
-        
-        mock_parser = MagicMock()
-        mock_parser_class.return_value = mock_parser
-        mock_parser.parse.return_value = {
-            "personal_info": {"name": "John Doe"},
-            "raw_text": "Sample CV text"
+    def test_ingest_stored_files_batches_parsing(self, mock_from_buffer, mock_upsert,
+    mock_extract_text, mock_parser_class, mock_cache):
+        store, jobs = self.make_jobs([(name, name.encode()) for name in ["cv1.pdf", "cv2.pdf", "cv3.pdf"]])
+        mock_upsert.side_effect = lambda records: {
+            "inserted": [record["filename"] for record in records], "updated": [], "failed": {}
         }
-        
+        mock_cache.get.return_value = None
         mock_from_buffer.return_value = "application/pdf"
-        
-        mock_extract_text.return_value = "Sample CV text"
-        
-        process_uploaded_files([mock_file])
-        
-        mock_from_buffer.assert_called_once_with(b"file content", mime=True)
-        mock_extract_text.assert_called_once_with(b"file content", "application/pdf")
-        mock_parser.parse.assert_called_once_with("Sample CV text")
-        mock_session_instance.add.assert_called_once()
-        mock_session_instance.commit.assert_called_once()
-        mock_success.assert_called()
-        mock_error.assert_not_called()
-        
+        mock_extract_text.side_effect = lambda file_bytes, file_type, ocr_profile=None: (
+            f"text of {file_bytes.decode()}"
+        )
+        mock_parser = mock_parser_class.return_value
+        mock_parser.mode = "full"
+        mock_parser.parse_many.side_effect = lambda texts: iter(
+            [{"personal_info": {"name": text}} for text in texts]
+        )
+
+        with patch('app.upload_store', store):
+            failures = app.ingest_stored_files(jobs)
+
+        self.assertEqual(failures, {})
+        # The pipeline batches whatever texts are ready, so how they are split
+        # between parse_many calls depends on timing.
+        parsed = [text for c in mock_parser.parse_many.call_args_list for text in c.args[0]]
+        self.assertEqual(sorted(parsed), [f"text of cv{i}.pdf" for i in range(1, 4)])
+        mock_parser.parse.assert_not_called()
+        records = [record for c in mock_upsert.call_args_list for record in c.args[0]]
+        self.assertEqual(sorted(record["filename"] for record in records), ["cv1.pdf", "cv2.pdf", "cv3.pdf"])
+        for record in records:
+            self.assertEqual(record["raw_text"], f"text of {record['filename']}")
+            self.assertEqual(record["personal_info"], {"name": record["raw_text"]})
+            self.assertEqual(record["content_hash"], hashlib.sha256(record["filename"].encode()).hexdigest())
+            self.assertEqual(record["parse_mode"], "full")
+
+    @patch('app.extraction_cache')
+    @patch('app.GenericCVParser')
     @patch('app.extract_text_from_file')
-    @patch('app.Session')
+    @patch('app.upsert_cv_documents')
     @patch('app.magic.from_buffer')
-    @patch('streamlit.success')
-    @patch('streamlit.error')
-    @patch('streamlit.warning')
-    def test_process_uploaded_files_text_extraction_failure(self, mock_warning, mock_error, 
-    mock_success, mock_from_buffer, 
-    mock_session, mock_extract_text):
-        mock_file = MagicMock()
-        mock_file.name = "test_cv.pdf"
-        mock_file.getvalue.return_value = b"file content"
-        
-        mock_session_instance = MagicMock()
-        mock_session.return_value = mock_session_instance
-        
+    def test_ingest_stored_files_uses_cached_text(self, mock_from_buffer, mock_upsert,
+    mock_extract_text, mock_parser_class, mock_cache):
+        store, jobs = self.make_jobs([("test_cv.pdf", b"file content")])
+        mock_upsert.return_value = {"inserted": [], "updated": ["test_cv.pdf"], "failed": {}}
+        mock_parser_class.return_value.parse_many.return_value = iter([{"personal_info": {"name": "John Doe"}}])
+        mock_parser_class.return_value.mode = "full"
         mock_from_buffer.return_value = "application/pdf"
-        
-        mock_extract_text.return_value = None
-        
-        process_uploaded_files([mock_file])
-        
-        mock_extract_text.assert_called_once_with(b"file content", "application/pdf")
-        mock_warning.assert_called_once()
-        mock_session_instance.add.assert_not_called()
-        
+        mock_cache.get.return_value = "Cached CV text"
+
+        with patch('app.upload_store', store):
+            self.assertEqual(app.ingest_stored_files(jobs), {})
+
+        mock_cache.make_key.assert_called_once()
+        mock_extract_text.assert_not_called()
+        mock_cache.put.assert_not_called()
+        mock_parser_class.return_value.parse_many.assert_called_once_with(["Cached CV text"])
+
+    @patch('app.current_generation', return_value=1)
+    @patch('app.search_cvs')
     @patch('app.Session')
-    def test_chat_interface(self, mock_session):
+    def test_chat_interface(self, mock_session, mock_search_cvs, mock_generation):
         mock_session_instance = MagicMock()
         mock_session.return_value = mock_session_instance
         
-        cv1 = MagicMock()
-        cv1.raw_text = "This is a CV with python experience"
-        cv1.filename = "cv1.pdf"
-        cv1.id = 1
-        
-        cv2 = MagicMock()
-        cv2.raw_text = "This is another CV with java experience"
-        cv2.filename = "cv2.pdf"
-        cv2.id = 2
-        
-        mock_session_instance.query.return_value.all.return_value = [cv1, cv2]
+        mock_search_cvs.return_value = [
+            {"id": 1, "filename": "cv1.pdf", "rank": -1.5, "snippet": "CV with **python** experience"}
+        ]
         
         with patch('app.cv_organizer_and_viewer') as mock_organizer:
             result = chat_interface("python")
             self.assertIn("Found 1 matching", result)
             mock_organizer.assert_called_once()
+            mock_search_cvs.assert_called_with(
+                mock_session_instance, "python", column=None, limit=app.SEARCH_RESULT_LIMIT + 1
+            )
             
             mock_organizer.reset_mock()
             
-            mock_session_instance.query.return_value.all.return_value = []
+            mock_search_cvs.return_value = []
             result = chat_interface("ruby")
             self.assertEqual(result, "No matching CVs found.")
             mock_organizer.assert_not_called()
+
+            chat_interface("docker skills")
+            mock_search_cvs.assert_called_with(
+                mock_session_instance, "docker", column="skills", limit=app.SEARCH_RESULT_LIMIT + 1
+            )
             
+    @patch('app.current_generation', return_value=1)
+    @patch('app.find_cvs_with_skills')
+    @patch('app.Session')
+    def test_chat_interface_caps_skill_results(self, mock_session, mock_find_cvs, mock_generation):
+        mock_find_cvs.return_value = [
+            {"id": i, "filename": f"cv{i}.pdf", "content_hash": None, "rank": None, "snippet": "Python"}
+            for i in range(app.SEARCH_RESULT_LIMIT + 1)
+        ]
+
+        with patch('app.cv_organizer_and_viewer') as mock_organizer:
+            result = chat_interface("python skills")
+
+        self.assertEqual(mock_find_cvs.call_args.kwargs["limit"], app.SEARCH_RESULT_LIMIT + 1)
+        self.assertEqual(mock_organizer.call_count, app.SEARCH_RESULT_LIMIT)
+        self.assertIn(f"Showing the first {app.SEARCH_RESULT_LIMIT} matching CVs", result)
+
+    @patch('app.current_generation')
+    @patch('app.cached_search')
+    @patch('app.Session')
+    def test_chat_interface_keys_search_on_generation(self, mock_session, mock_cached_search,
+    mock_generation):
+        mock_cached_search.return_value = []
+        mock_generation.return_value = 7
+
+        chat_interface("python")
+        mock_cached_search.assert_called_with(7, "python", None)
+
+        mock_generation.return_value = 8
+        chat_interface("docker skills")
+        mock_cached_search.assert_called_with(8, "docker", "skills")
+
     def test_cv_organizer_and_viewer_dict_input(self):
         cv_entry = {
             "filename": "test_cv.pdf",
@@ -134,5 +191,140 @@ class TestApp(unittest.TestCase):
                 with patch('app.st.download_button') as mock_download:
                     cv_organizer_and_viewer(cv_entry)
 
+    def test_cv_organizer_and_viewer_does_not_read_file_on_render(self):
+        with patch('app.st.columns') as mock_columns, \
+                patch('app.st.button', return_value=False), \
+                patch('app.read_upload_bytes') as mock_read, \
+                patch('app.st.download_button') as mock_download:
+            mock_columns.return_value = [MagicMock(), MagicMock(), MagicMock()]
+            cv_organizer_and_viewer({"filename": "test_cv.pdf", "id": 1})
+
+            mock_read.assert_not_called()
+            mock_download.assert_not_called()
+
+    def test_cv_organizer_and_viewer_reads_file_when_download_clicked(self):
+        with patch('app.st.columns') as mock_columns, \
+                patch('app.st.button', side_effect=lambda label, key: key == "prepare_dl_1"), \
+                patch('app.read_upload_bytes', return_value=b"PDF bytes") as mock_read, \
+                patch('app.st.download_button') as mock_download:
+            mock_columns.return_value = [MagicMock(), MagicMock(), MagicMock()]
+            cv_organizer_and_viewer({"filename": "test_cv.pdf", "id": 1})
+
+            mock_read.assert_called_once()
+            self.assertEqual(mock_download.call_args.kwargs["data"], b"PDF bytes")
+
+    def test_open_pdf_in_new_tab_reads_stored_file(self):
+        store = FileStore(self.temp_dir.name)
+        pdf_bytes = b"%PDF-1.4 " + bytes(range(256)) * 10
+        digest = store.put(pdf_bytes)
+        recent_files = RecentFiles()
+
+        with patch('app.upload_store', store), \
+                patch('app.get_recent_files', return_value=recent_files), \
+                patch('app.html') as mock_html, \
+                patch('app.st.error') as mock_error:
+            app.open_pdf_in_new_tab("cv.pdf", digest)
+            self.assertIn(base64.b64encode(pdf_bytes).decode(), mock_html.call_args.args[0])
+            self.assertEqual(recent_files.paths(), [store.path_for(digest)])
+
+            app.open_pdf_in_new_tab("missing.pdf")
+            mock_error.assert_called_once_with("File missing")
+
+    def test_read_upload_bytes_uses_shared_recent_files(self):
+        path = os.path.join(self.temp_dir.name, "cv.pdf")
+        with open(path, "wb") as f:
+            f.write(b"PDF bytes")
+        recent_files = RecentFiles()
+
+        with patch('app.get_recent_files', return_value=recent_files):
+            self.assertEqual(read_upload_bytes(path), b"PDF bytes")
+            self.assertIsNone(read_upload_bytes(os.path.join(self.temp_dir.name, "missing.pdf")))
+        self.assertEqual(recent_files.paths(), [path])
+
+    @patch('app.upsert_cv_documents')
+    @patch('app.GenericCVParser')
+    @patch('app.extract_text_from_file')
+    @patch('app.extraction_cache')
+    @patch('app.magic.from_buffer')
+    def test_ingest_stored_files(self, mock_from_buffer, mock_cache, mock_extract_text,
+    mock_parser_class, mock_upsert):
+        for name, content in [("queued.pdf", b"file content"), ("blank.pdf", b"blank")]:
+            with open(os.path.join(self.temp_dir.name, name), "wb") as f:
+                f.write(content)
+        mock_from_buffer.return_value = "application/pdf"
+        mock_cache.get.return_value = None
+        mock_extract_text.side_effect = lambda file_bytes, file_type, ocr_profile=None: (
+            "Queued CV text" if file_bytes == b"file content" else None
+        )
+        mock_parser_class.return_value.parse_many.side_effect = lambda texts: iter(
+            [{"skills": ["Python"]} for _ in texts]
+        )
+        mock_parser_class.return_value.mode = "lite"
+        mock_upsert.return_value = {"inserted": ["queued.pdf"], "updated": [], "failed": {}}
+        jobs = [
+            {"id": 1, "batch_id": "b1", "filename": "queued.pdf", "content_hash": None, "ocr_profile": "fast"},
+            {"id": 2, "batch_id": "b1", "filename": "blank.pdf", "content_hash": None, "ocr_profile": "fast"},
+            {"id": 3, "batch_id": "b1", "filename": "gone.pdf", "content_hash": None, "ocr_profile": "fast"},
+        ]
+
+        with patch('app.upload_store', FileStore(self.temp_dir.name)):
+            failures = app.ingest_stored_files(jobs)
+
+        mock_extract_text.assert_any_call(b"file content", "application/pdf", ocr_profile="fast")
+        mock_parser_class.return_value.parse_many.assert_called_once_with(["Queued CV text"])
+        mock_upsert.assert_called_once_with([{
+            "skills": ["Python"], "filename": "queued.pdf", "content_hash": None,
+            "parser_version": app.PARSER_VERSION, "parse_mode": "lite",
+            "raw_text": "Queued CV text",
+        }])
+        self.assertEqual(sorted(failures), [2, 3])
+        self.assertEqual(failures[2], "Could not extract text from blank.pdf")
+
+    @patch('app.get_ingest_queue')
+    @patch('streamlit.info')
+    def test_queue_uploaded_files_skips_known_content(self, mock_info, mock_get_queue):
+        uploads = []
+        for name, content in [("File (3).pdf", b"same cv"), ("cv_final.pdf", b"same cv"),
+                              ("other.pdf", b"stored cv"), ("new.pdf", b"new cv")]:
+            upload = MagicMock()
+            upload.name = name
+            upload.getvalue.return_value = content
+            uploads.append(upload)
+        self.known_content[hashlib.sha256(b"stored cv").hexdigest()] = "stored.pdf"
+
+        store = FileStore(self.temp_dir.name)
+        with patch('app.upload_store', store):
+            app.queue_uploaded_files(uploads, ocr_profile="fast")
+
+        mock_get_queue.return_value.enqueue.assert_called_once_with(
+            ["File (3).pdf", "new.pdf"],
+            ocr_profile="fast",
+            content_hashes=[hashlib.sha256(b"same cv").hexdigest(), hashlib.sha256(b"new cv").hexdigest()],
+        )
+        messages = [c.args[0] for c in mock_info.call_args_list]
+        self.assertIn("cv_final.pdf has the same content as File (3).pdf, linked it to that CV", messages)
+        self.assertIn("other.pdf has the same content as stored.pdf, linked it to that CV", messages)
+        self.assertEqual(self.mock_add_cv_aliases.call_args.args[1], [
+            ("cv_final.pdf", hashlib.sha256(b"same cv").hexdigest()),
+            ("other.pdf", hashlib.sha256(b"stored cv").hexdigest()),
+        ])
+        for content in [b"same cv", b"new cv"]:
+            self.assertTrue(store.exists(hashlib.sha256(content).hexdigest()))
+        self.assertFalse(store.exists(hashlib.sha256(b"stored cv").hexdigest()))
+
+    @patch('app.upsert_cv_documents')
+    @patch('app.extract_text_from_file')
+    def test_ingest_stored_files_skips_content_saved_meanwhile(self, mock_extract_text, mock_upsert):
+        digest = hashlib.sha256(b"same cv").hexdigest()
+        self.known_content[digest] = "first.pdf"
+        job = {"id": 2, "batch_id": "b1", "filename": "second.pdf", "content_hash": digest,
+               "ocr_profile": None}
+
+        self.assertEqual(app.ingest_stored_files([job]), {2: ("duplicate", "Same content as first.pdf")})
+
+        mock_extract_text.assert_not_called()
+        mock_upsert.assert_not_called()
+        self.assertEqual(self.mock_add_cv_aliases.call_args.args[1], [("second.pdf", digest)])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,193 @@
+import datetime
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import bulk_ingest
+from bulk_ingest import process_file, run_ingest
+from database import Base, CVDocument
+from file_store import FileStore
+
+
+class TestBulkIngest(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:")
+        self.Session = sessionmaker(bind=self.engine)
+        Base.metadata.create_all(self.engine)
+        self.source_dir = tempfile.TemporaryDirectory()
+        self.upload_dir = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.source_dir.name, "nested"))
+        self.paths = []
+        for i, folder in enumerate(["", "nested"]):
+            path = os.path.join(self.source_dir.name, folder, f"cv{i}.txt")
+            with open(path, "w") as f:
+                f.write(f"Jane Doe {i}\njane{i}@example.com\n\nSKILLS\nPython, SQL\n")
+            self.paths.append(path)
+        with open(os.path.join(self.source_dir.name, "photo.png"), "wb") as f:
+            f.write(b"\x89PNG\r\n\x1a\n0000")
+
+    def tearDown(self):
+        Base.metadata.drop_all(self.engine)
+        self.source_dir.cleanup()
+        self.upload_dir.cleanup()
+
+    def ingest(self, **kwargs):
+        return run_ingest(
+            self.source_dir.name, workers=1, upload_dir=self.upload_dir.name,
+            session_factory=self.Session, **kwargs
+        )
+
+    def test_run_ingest_saves_supported_files(self):
+        stats = self.ingest(batch_size=1)
+
+        self.assertEqual(stats["files"], 3)
+        self.assertEqual(stats["saved"], 2)
+        self.assertEqual(stats["unsupported"], 1)
+        self.assertEqual(stats["failed"], 0)
+        session = self.Session()
+        try:
+            filenames = sorted(name for (name,) in session.query(CVDocument.filename))
+        finally:
+            session.close()
+        self.assertEqual(filenames, ["cv0.txt", "nested/cv1.txt"])
+        with open(self.paths[1], "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        self.assertTrue(FileStore(self.upload_dir.name).exists(digest))
+
+    def test_run_ingest_resumes(self):
+        self.ingest()
+
+        stats = self.ingest()
+        self.assertEqual(stats["skipped"], 2)
+        self.assertEqual(stats["saved"], 0)
+
+        with open(self.paths[0], "a") as f:
+            f.write("Docker\n")
+        future = time.time() + 60
+        os.utime(self.paths[0], (future, future))
+        stats = self.ingest()
+        self.assertEqual(stats["saved"], 1)
+        self.assertEqual(sorted(self.stored_cvs()), ["cv0.txt", "nested/cv1.txt"])
+
+        self.assertEqual(self.ingest(force=True)["saved"], 2)
+
+    def add_app_upload(self, filename, updated_at=None):
+        session = self.Session()
+        try:
+            session.add(CVDocument(filename=filename, content_hash="app", raw_text="ALICE",
+                                   updated_at=updated_at or datetime.datetime.utcnow()))
+            session.commit()
+        finally:
+            session.close()
+
+    def stored_cvs(self):
+        session = self.Session()
+        try:
+            return dict(session.query(CVDocument.filename, CVDocument.content_hash))
+        finally:
+            session.close()
+
+    def test_run_ingest_keeps_app_upload_with_the_same_name(self):
+        self.add_app_upload("cv0.txt", updated_at=datetime.datetime(2000, 1, 1))
+
+        stats = self.ingest()
+
+        self.assertEqual(stats["saved"], 2)
+        stored = self.stored_cvs()
+        self.assertEqual(stored["cv0.txt"], "app")
+        with open(self.paths[0], "rb") as f:
+            self.assertEqual(stored["cv0 (2).txt"], hashlib.sha256(f.read()).hexdigest())
+
+    def test_run_ingest_does_not_skip_files_named_like_newer_app_uploads(self):
+        past = time.time() - 3600
+        os.utime(self.paths[0], (past, past))
+        self.add_app_upload("cv0.txt")
+
+        stats = self.ingest()
+        self.assertEqual(stats["skipped"], 0)
+        self.assertEqual(stats["saved"], 2)
+        self.assertEqual(sorted(self.stored_cvs()), ["cv0 (2).txt", "cv0.txt", "nested/cv1.txt"])
+
+        # On the next run the file is only hashed and found to be stored already.
+        with patch('bulk_ingest.extract_text_from_file') as mock_extract_text:
+            stats = self.ingest()
+        mock_extract_text.assert_not_called()
+        self.assertEqual(stats["saved"], 0)
+        self.assertEqual(stats["skipped"] + stats["duplicates"], 2)
+
+    def test_run_ingest_keeps_same_named_files_apart(self):
+        os.makedirs(os.path.join(self.source_dir.name, "other"))
+        same_name = os.path.join(self.source_dir.name, "other", "cv1.txt")
+        with open(same_name, "w") as f:
+            f.write("John Roe\njohn@example.com\n\nSKILLS\nJava\n")
+
+        stats = self.ingest()
+        self.assertEqual(stats["saved"], 3)
+        session = self.Session()
+        try:
+            filenames = sorted(name for (name,) in session.query(CVDocument.filename))
+        finally:
+            session.close()
+        self.assertEqual(filenames, ["cv0.txt", "nested/cv1.txt", "other/cv1.txt"])
+
+        stats = self.ingest()
+        self.assertEqual(stats["skipped"], 3)
+        self.assertEqual(stats["saved"], 0)
+
+    def test_run_ingest_skips_known_content(self):
+        self.ingest()
+        shutil.copy(self.paths[0], os.path.join(self.source_dir.name, "nested", "renamed.txt"))
+        shutil.copy(self.paths[1], os.path.join(self.source_dir.name, "copy_a.txt"))
+        shutil.copy(self.paths[1], os.path.join(self.source_dir.name, "copy_b.txt"))
+
+        with patch('bulk_ingest.extract_text_from_file') as mock_extract_text:
+            stats = self.ingest()
+
+        mock_extract_text.assert_not_called()
+        self.assertEqual(stats["duplicates"], 3)
+        self.assertEqual(stats["saved"], 0)
+        stored = [name for _, _, names in os.walk(self.upload_dir.name) for name in names]
+        self.assertEqual(len(stored), 2)
+
+    def test_run_ingest_lite_mode(self):
+        self.ingest(parse_mode="lite")
+
+        session = self.Session()
+        try:
+            rows = session.query(CVDocument.parse_mode, CVDocument.skills).all()
+        finally:
+            session.close()
+        self.assertEqual([mode for mode, _ in rows], ["lite", "lite"])
+        self.assertIn("Python", rows[0][1])
+
+    @patch('bulk_ingest.extract_text_from_file')
+    def test_process_file_reports_extraction_failure(self, mock_extract_text):
+        mock_extract_text.return_value = None
+
+        result = process_file(self.paths[0], upload_dir=None)
+
+        self.assertIsNone(result["record"])
+        self.assertEqual(result["error"], "Could not extract text")
+        self.assertEqual(result["pages"], 1)
+
+    @patch('bulk_ingest.engine')
+    @patch('bulk_ingest.GenericCVParser')
+    @patch('bulk_ingest.extract_text_from_file')
+    def test_pool_workers_ocr_single_threaded(self, mock_extract_text, mock_parser_class, mock_engine):
+        mock_extract_text.return_value = None
+        with patch.multiple(bulk_ingest, _parser=None, _known_hashes=frozenset(), _ocr_workers=None):
+            bulk_ingest._init_worker(frozenset())
+            process_file(self.paths[0], upload_dir=None)
+
+        self.assertEqual(mock_extract_text.call_args.kwargs["ocr_workers"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,31 @@ import unittest
 from unittest.mock import patch, MagicMock
 import json
 import spacy
-from cv_parser import GenericCVParser
+from spacy.tokens import Doc
+import re
+from cv_parser import (
+    EntityIndex,
+    GenericCVParser,
+    SECTION_PATTERNS,
+    load_nlp,
+    scoped_regions,
+    segment_sections,
+)
+
+def rescan_sections(text):
+    """Reference copy of the original per-section regex segmentation"""
+    sections = {}
+    for section, pattern in SECTION_PATTERNS.items():
+        matches = list(re.finditer(pattern, text, re.IGNORECASE))
+        if matches:
+            start = matches[0].end()
+            end = len(text)
+            for other_pattern in SECTION_PATTERNS.values():
+                other_matches = list(re.finditer(other_pattern, text[start:], re.IGNORECASE))
+                if other_matches:
+                    end = min(end, start + other_matches[0].start())
+            sections[section] = text[start:end].strip()
+    return sections
 
 class TestGenericCVParser(unittest.TestCase):
     def setUp(self):
@@ -51,6 +75,92 @@ class TestGenericCVParser(unittest.TestCase):
         for key in expected_keys:
             self.assertIn(key, result)
 
+    def test_parse_many_matches_parse(self):
+        other_cv_text = "JANE ROE\njane.roe@example.com\n\nSKILLS\nDocker, Kubernetes\n"
+        results = list(self.parser.parse_many([self.sample_cv_text, other_cv_text], batch_size=1))
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0], self.parser.parse(self.sample_cv_text))
+        self.assertEqual(results[1], self.parser.parse(other_cv_text))
+
+    def test_scoped_regions(self):
+        text = "JANE ROE\nLondon\n\nEDUCATION\nBSc\n\nExperience\nData Analyst\nAcme | 2019-2021\n\nSKILLS\nPython\n"
+        header, experience = scoped_regions(text)
+        self.assertEqual(header, "JANE ROE\nLondon\n\n")
+        self.assertEqual(experience.strip(), "Data Analyst\nAcme | 2019-2021")
+
+        self.assertEqual(scoped_regions("JANE ROE\nBroad experience in sales\n\nSKILLS\nPython"), ("", None))
+
+    def test_scoped_mode_matches_full_mode(self):
+        scoped_parser = GenericCVParser(mode="scoped")
+        no_experience_text = "JANE ROE\njane.roe@example.com\nData Analyst at Acme\n\nSKILLS\nDocker, Kubernetes\n"
+
+        full = self.parser.parse(self.sample_cv_text)
+        scoped = scoped_parser.parse(self.sample_cv_text)
+        for key in ["education", "projects", "certifications"]:
+            self.assertEqual(scoped[key], full[key])
+        self.assertEqual(sorted(scoped["skills"]), sorted(full["skills"]))
+        self.assertEqual(scoped["personal_info"]["email"], full["personal_info"]["email"])
+        self.assertEqual(
+            [job["title"] for job in scoped["work_experience"]],
+            [job["title"] for job in full["work_experience"]],
+        )
+        self.assertEqual(scoped_parser.parse(no_experience_text), self.parser.parse(no_experience_text))
+
+        results = list(scoped_parser.parse_many([self.sample_cv_text, no_experience_text], batch_size=1))
+        self.assertEqual(results, [scoped, scoped_parser.parse(no_experience_text)])
+
+        with self.assertRaises(ValueError):
+            GenericCVParser(mode="fast")
+
+    def test_lite_mode_skips_spacy(self):
+        lite_parser = GenericCVParser(mode="lite")
+        full = self.parser.parse(self.sample_cv_text)
+
+        with patch('cv_parser.nlp', side_effect=AssertionError("nlp called")) as mock_nlp:
+            lite = lite_parser.parse(self.sample_cv_text)
+            self.assertEqual(list(lite_parser.parse_many([self.sample_cv_text])), [lite])
+        mock_nlp.pipe.assert_not_called()
+
+        self.assertEqual(list(lite), list(full))
+        for key in ["education", "projects", "certifications"]:
+            self.assertEqual(lite[key], full[key])
+        self.assertEqual(sorted(lite["skills"]), sorted(full["skills"]))
+        for key in ["name", "email", "phone", "linkedin", "github"]:
+            self.assertEqual(lite["personal_info"][key], full["personal_info"][key])
+        self.assertEqual(lite["personal_info"]["location"], "York, NY")
+        self.assertEqual(lite["work_experience"], [])
+
+    def test_lite_skill_matcher_respects_word_boundaries(self):
+        lite_parser = GenericCVParser(mode="lite")
+        text = "Built React Native apps in Go with Node.js, not Gopher or Javascript"
+        skills = lite_parser._extract_skills(None, "", text)
+        self.assertEqual(sorted(skills), ["Go", "Node.js", "React Native"])
+
+    @patch('cv_parser.spacy.load')
+    def test_load_nlp_excludes_unused_components(self, mock_load):
+        load_nlp()
+        excluded = mock_load.call_args.kwargs["exclude"]
+        for component in ["parser", "tagger", "lemmatizer"]:
+            self.assertIn(component, excluded)
+        self.assertNotIn("ner", excluded)
+
+        load_nlp(exclude=[])
+        self.assertEqual(mock_load.call_args.kwargs["exclude"], [])
+
+    def test_entity_index_lookups(self):
+        words = ["Engineer", "at", "Google", "Jan", "2020", "then", "Microsoft", "since", "2021"]
+        ents = ["O", "O", "B-ORG", "B-DATE", "I-DATE", "O", "B-ORG", "O", "B-DATE"]
+        doc = Doc(spacy.blank("en").vocab, words=words, ents=ents)
+        index = EntityIndex(doc)
+
+        self.assertEqual(index.next_after("ORG", 0).text, "Google")
+        self.assertEqual(index.next_after("ORG", 2).text, "Microsoft")
+        self.assertIsNone(index.next_after("ORG", 6))
+        self.assertIsNone(index.next_after("GPE", 0))
+        self.assertEqual([ent.text for ent in index.between("DATE", 0, 9)], ["Jan 2020", "2021"])
+        self.assertEqual([ent.text for ent in index.between("DATE", 3, 9)], ["2021"])
+        self.assertEqual(index.between("DATE", 4, 8), [])
+
     def test_extract_personal_info(self):
         doc = spacy.load("en_core_web_sm")(self.sample_cv_text)
         info = self.parser._extract_personal_info(doc)
@@ -67,6 +177,22 @@ class TestGenericCVParser(unittest.TestCase):
         self.assertIn("projects", sections)
         self.assertIn("certifications", sections)
 
+    def test_identify_sections_regex_matches_rescan(self):
+        texts = [
+            self.sample_cv_text,
+            self.sample_cv_text * 3,
+            "Technical Skills\nPython\n\nKey Projects\nSearch engine\n",
+            "SKILLS\n\nEDUCATION\nBSc\nSKILLS\nGo\n",
+            "No headings in this text at all",
+        ]
+        for text in texts:
+            with self.subTest(text=text[:30]):
+                self.assertEqual(
+                    self.parser._identify_sections(text, use_layout_analysis=False),
+                    rescan_sections(text),
+                )
+        self.assertEqual(segment_sections("EDUCATION\nBSc\nSKILLS\nGo"), {"education": "BSc", "skills": "Go"})
+
     def test_extract_education(self):
         doc = spacy.load("en_core_web_sm")(self.sample_cv_text)
         sections = self.parser._identify_sections(self.sample_cv_text)
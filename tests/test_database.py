@@ -4,7 +4,19 @@ import datetime
 import json
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from database import Base, CVDocument
+from sqlalchemy import inspect
+import os
+import tempfile
+from sqlalchemy import text
+from database import (
+    Base,
+    CVDocument,
+    create_db_engine,
+    current_generation,
+    find_known_content,
+    list_cv_page,
+    upsert_cv_documents,
+)
 
 class TestDatabase(unittest.TestCase):
     def setUp(self):
@@ -103,5 +115,205 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(cv_dict["personal_info"]["name"], "John Doe")
         self.assertEqual(cv_dict["education"][0]["degree"], "BS")
 
+    def test_raw_text_is_deferred(self):
+        session = self.Session()
+        try:
+            session.add(CVDocument(filename="test_cv.pdf", raw_text=self.sample_data["raw_text"]))
+            session.commit()
+            session.expunge_all()
+
+            db_cv = session.query(CVDocument).filter_by(filename="test_cv.pdf").first()
+            self.assertNotIn("raw_text", inspect(db_cv).dict)
+            self.assertEqual(db_cv.raw_text, "Sample CV text")
+        finally:
+            session.close()
+
+    def test_list_cv_page_keyset_pagination(self):
+        session = self.Session()
+        try:
+            session.add_all([CVDocument(filename=f"cv{i}.pdf", raw_text="x" * 1000) for i in range(5)])
+            session.commit()
+
+            rows, has_more = list_cv_page(session, page_size=2)
+            self.assertEqual([row.filename for row in rows], ["cv0.pdf", "cv1.pdf"])
+            self.assertTrue(has_more)
+            self.assertNotIn("raw_text", rows[0]._fields)
+
+            rows, has_more = list_cv_page(session, after_id=rows[-1].id, page_size=2)
+            self.assertEqual([row.filename for row in rows], ["cv2.pdf", "cv3.pdf"])
+            self.assertTrue(has_more)
+
+            rows, has_more = list_cv_page(session, after_id=rows[-1].id, page_size=2)
+            self.assertEqual([row.filename for row in rows], ["cv4.pdf"])
+            self.assertFalse(has_more)
+        finally:
+            session.close()
+
+    def test_create_db_engine_tunes_sqlite(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_engine = create_db_engine(f"sqlite:///{os.path.join(temp_dir, 'tuned.db')}", pool_size=3)
+            try:
+                with file_engine.connect() as connection:
+                    pragma = lambda name: connection.execute(text(f"PRAGMA {name}")).scalar()
+                    self.assertEqual(pragma("journal_mode"), "wal")
+                    self.assertEqual(pragma("synchronous"), 1)
+                    self.assertEqual(pragma("busy_timeout"), 5000)
+                    self.assertLess(pragma("cache_size"), 0)
+                    self.assertGreater(pragma("mmap_size"), 0)
+                self.assertEqual(file_engine.pool.size(), 3)
+
+                Base.metadata.create_all(file_engine)
+                Session = sessionmaker(bind=file_engine)
+                session = Session()
+                try:
+                    session.add(CVDocument(filename="tuned.pdf", raw_text="text"))
+                    session.commit()
+                    self.assertEqual(session.query(CVDocument).count(), 1)
+                finally:
+                    session.close()
+            finally:
+                file_engine.dispose()
+
+    def test_upsert_cv_documents_inserts_and_updates(self):
+        session = self.Session()
+        try:
+            session.add(CVDocument(filename="cv0.pdf", raw_text="old text", skills=["Go"]))
+            session.commit()
+        finally:
+            session.close()
+
+        records = [dict(self.sample_data, filename=f"cv{i}.pdf") for i in range(5)]
+        result = upsert_cv_documents(records, chunk_size=2, session_factory=self.Session)
+
+        self.assertEqual(result["updated"], ["cv0.pdf"])
+        self.assertEqual(result["inserted"], ["cv1.pdf", "cv2.pdf", "cv3.pdf", "cv4.pdf"])
+        self.assertEqual(result["failed"], {})
+        session = self.Session()
+        try:
+            self.assertEqual(session.query(CVDocument).count(), 5)
+            updated = session.query(CVDocument).filter_by(filename="cv0.pdf").first()
+            self.assertEqual(updated.raw_text, "Sample CV text")
+            self.assertEqual(updated.skills, ["Python", "JavaScript"])
+            skills = session.execute(
+                text("SELECT skill_normalized FROM cv_skills WHERE cv_id = :id ORDER BY 1"),
+                {"id": updated.id},
+            ).scalars().all()
+            self.assertEqual(skills, ["javascript", "python"])
+        finally:
+            session.close()
+
+    def test_upsert_cv_documents_isolates_bad_records(self):
+        records = [
+            dict(self.sample_data, filename="good1.pdf"),
+            dict(self.sample_data, filename="bad.pdf", personal_info={"name": {"not", "json"}}),
+            dict(self.sample_data, filename="good2.pdf"),
+        ]
+        result = upsert_cv_documents(records, session_factory=self.Session)
+
+        self.assertEqual(result["inserted"], ["good1.pdf", "good2.pdf"])
+        self.assertEqual(list(result["failed"]), ["bad.pdf"])
+        session = self.Session()
+        try:
+            filenames = [row.filename for row in session.query(CVDocument.filename).order_by(CVDocument.id)]
+            self.assertEqual(filenames, ["good1.pdf", "good2.pdf"])
+        finally:
+            session.close()
+
+    def test_upsert_cv_documents_keeps_different_cvs_with_the_same_name(self):
+        upsert_cv_documents([{"filename": "cv.pdf", "content_hash": "aaa"}], session_factory=self.Session)
+
+        result = upsert_cv_documents(
+            [{"filename": "cv.pdf", "content_hash": "bbb"}, {"filename": "cv.pdf", "content_hash": "ccc"}],
+            session_factory=self.Session,
+        )
+        self.assertEqual(result["inserted"], ["cv.pdf", "cv.pdf"])
+        self.assertEqual(result["updated"], [])
+
+        # The same content again updates the row it was saved under.
+        result = upsert_cv_documents(
+            [{"filename": "cv.pdf", "content_hash": "bbb", "skills": ["Go"]}], session_factory=self.Session
+        )
+        self.assertEqual(result["updated"], ["cv.pdf"])
+        self.assertEqual(result["renamed"], {"cv.pdf": "cv (2).pdf"})
+        session = self.Session()
+        try:
+            rows = session.query(CVDocument.filename, CVDocument.content_hash, CVDocument.skills).order_by(
+                CVDocument.id
+            ).all()
+        finally:
+            session.close()
+        self.assertEqual(
+            [tuple(row) for row in rows],
+            [("cv.pdf", "aaa", None), ("cv (2).pdf", "bbb", ["Go"]), ("cv (3).pdf", "ccc", None)],
+        )
+
+        # Only CVs of replace_source are replaced by different content.
+        result = upsert_cv_documents(
+            [{"filename": "cv.pdf", "content_hash": "ddd", "source": "bulk"}],
+            session_factory=self.Session, replace_source="bulk",
+        )
+        self.assertEqual(result["renamed"], {"cv.pdf": "cv (4).pdf"})
+        result = upsert_cv_documents(
+            [{"filename": "cv (4).pdf", "content_hash": "eee", "source": "bulk"}],
+            session_factory=self.Session, replace_source="bulk",
+        )
+        self.assertEqual(result["updated"], ["cv (4).pdf"])
+        self.assertEqual(result["renamed"], {})
+
+    def test_generation_changes_on_every_write(self):
+        session = self.Session()
+        try:
+            self.assertEqual(current_generation(session), 0)
+            cv_doc = CVDocument(filename="test_cv.pdf", raw_text="text")
+            session.add(cv_doc)
+            session.commit()
+            after_insert = current_generation(session)
+            self.assertGreater(after_insert, 0)
+
+            cv_doc.skills = ["Python"]
+            session.commit()
+            after_update = current_generation(session)
+            self.assertGreater(after_update, after_insert)
+
+            session.delete(cv_doc)
+            session.commit()
+            self.assertGreater(current_generation(session), after_update)
+        finally:
+            session.close()
+
+    def test_create_all_adds_new_columns_to_existing_tables(self):
+        old_engine = create_engine('sqlite:///:memory:')
+        with old_engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE cv_documents (id INTEGER PRIMARY KEY, filename VARCHAR(255) UNIQUE, "
+                "personal_info JSON, education JSON, work_experience JSON, skills JSON, "
+                "projects JSON, certifications JSON, raw_text TEXT, created_at DATETIME, "
+                "updated_at DATETIME)"
+            ))
+            connection.execute(text("INSERT INTO cv_documents (filename) VALUES ('old.pdf')"))
+
+        Base.metadata.create_all(old_engine)
+
+        columns = [column["name"] for column in inspect(old_engine).get_columns("cv_documents")]
+        self.assertIn("content_hash", columns)
+        indexes = [index["name"] for index in inspect(old_engine).get_indexes("cv_documents")]
+        self.assertIn("ix_cv_documents_content_hash", indexes)
+        session = sessionmaker(bind=old_engine)()
+        try:
+            self.assertIsNone(session.query(CVDocument).one().content_hash)
+        finally:
+            session.close()
+
+    def test_find_known_content(self):
+        upsert_cv_documents(
+            [{"filename": "a.pdf", "content_hash": "aaa"}, {"filename": "b.pdf", "content_hash": "bbb"}],
+            session_factory=self.Session,
+        )
+        session = self.Session()
+        try:
+            self.assertEqual(find_known_content(session, ["aaa", "zzz"]), {"aaa": "a.pdf"})
+        finally:
+            session.close()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
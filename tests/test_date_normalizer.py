@@ -0,0 +1,44 @@
+import unittest
+from datetime import date, datetime
+from dateutil.parser import parse
+from date_normalizer import normalize_date, date_cache_stats, clear_date_cache
+
+def dateutil_reference(date_str, today):
+    try:
+        return parse(date_str, fuzzy=True, default=datetime(today.year, today.month, today.day)).isoformat()
+    except (ValueError, OverflowError):
+        return None
+
+class TestDateNormalizer(unittest.TestCase):
+    def setUp(self):
+        clear_date_cache()
+
+    def test_matches_dateutil(self):
+        samples = ["2019", " 2019 ", "Jan 2020", "January 2020", "Sept 2020", "Jan. 2020",
+                   "Feb 2021", "03/2021", "3-2021", "13/2021", "03.2021", "Jun 2018 - Dec 2020",
+                   "Present", "since 2015", "not a date", "0000"]
+        for today in [date(2026, 10, 17), date(2024, 1, 31), date(2023, 3, 30)]:
+            for sample in samples:
+                with self.subTest(sample=sample, today=today):
+                    self.assertEqual(normalize_date(sample, today), dateutil_reference(sample, today))
+
+    def test_ongoing_words_are_not_dates(self):
+        for word in ["Present", "current", "NOW"]:
+            self.assertIsNone(normalize_date(word))
+
+    def test_cache_stats(self):
+        today = date(2026, 10, 17)
+        normalize_date("2019", today)
+        normalize_date("Jan 2020", today)
+        normalize_date("Summer of 2019", today)
+        normalize_date("Summer of 2019", today)
+
+        stats = date_cache_stats()
+        self.assertEqual(stats["fast_path"], 2)
+        self.assertEqual(stats["fallback"], 2)
+        self.assertEqual(stats["memo_hits"], 1)
+        self.assertEqual(stats["memo_misses"], 1)
+        self.assertEqual(stats["memo_size"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database import Base, ExtractionCacheEntry
+from extraction_cache import ExtractionCache
+
+class TestExtractionCache(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        self.Session = sessionmaker(bind=self.engine)
+        Base.metadata.create_all(self.engine)
+        self.cache = ExtractionCache(session_factory=self.Session, max_bytes=100)
+
+    def tearDown(self):
+        Base.metadata.drop_all(self.engine)
+
+    def test_get_after_put_is_a_hit(self):
+        key = self.cache.make_key(b"file content", "application/pdf")
+        self.assertIsNone(self.cache.get(key))
+
+        self.cache.put(key, "Extracted CV text")
+
+        self.assertEqual(self.cache.get(key), "Extracted CV text")
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["entries"], 1)
+
+    def test_key_depends_on_content_type_and_settings(self):
+        key = self.cache.make_key(b"file content", "application/pdf", {"dpi": 200})
+        self.assertEqual(key, self.cache.make_key(b"file content", "application/pdf", {"dpi": 200}))
+        self.assertNotEqual(key, self.cache.make_key(b"other content", "application/pdf", {"dpi": 200}))
+        self.assertNotEqual(key, self.cache.make_key(b"file content", "text/plain", {"dpi": 200}))
+        self.assertNotEqual(key, self.cache.make_key(b"file content", "application/pdf", {"dpi": 300}))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        self.cache.put("first", "a" * 40)
+        self.cache.put("second", "b" * 40)
+        self.cache.get("first")
+
+        self.cache.put("third", "c" * 40)
+
+        self.assertEqual(self.cache.get("first"), "a" * 40)
+        self.assertIsNone(self.cache.get("second"))
+        self.assertEqual(self.cache.get("third"), "c" * 40)
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+        session = self.Session()
+        try:
+            self.assertEqual(session.query(ExtractionCacheEntry).count(), 2)
+        finally:
+            session.close()
+
+if __name__ == '__main__':
+    unittest.main()
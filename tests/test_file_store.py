@@ -0,0 +1,81 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from file_store import FileStore, RecentFiles
+
+
+class TestFileStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = FileStore(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def stored_files(self):
+        return [
+            os.path.relpath(os.path.join(directory, name), self.temp_dir.name)
+            for directory, _, names in os.walk(self.temp_dir.name)
+            for name in names
+        ]
+
+    def test_put_shards_by_hash_prefix(self):
+        digest = self.store.put(b"cv bytes")
+
+        self.assertEqual(digest, hashlib.sha256(b"cv bytes").hexdigest())
+        self.assertEqual(self.stored_files(), [os.path.join(digest[:2], digest[2:4], digest)])
+        self.assertEqual(self.store.put(b"cv bytes"), digest)
+        self.assertEqual(len(self.stored_files()), 1)
+
+    def test_failed_write_leaves_nothing_behind(self):
+        with patch('file_store.os.replace', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.store.put(b"cv bytes")
+
+        self.assertEqual(self.stored_files(), [])
+        self.assertFalse(self.store.exists(hashlib.sha256(b"cv bytes").hexdigest()))
+
+    def test_resolve_falls_back_to_older_layouts(self):
+        flat_digest = hashlib.sha256(b"flat").hexdigest()
+        with open(os.path.join(self.temp_dir.name, flat_digest), "wb") as f:
+            f.write(b"flat")
+        sharded_digest = self.store.put(b"sharded")
+
+        self.assertEqual(self.store.resolve("a.pdf", sharded_digest), self.store.path_for(sharded_digest))
+        self.assertEqual(self.store.resolve("b.pdf", flat_digest),
+                         os.path.join(self.temp_dir.name, flat_digest))
+        self.assertEqual(self.store.resolve("legacy.pdf"), os.path.join(self.temp_dir.name, "legacy.pdf"))
+
+    def test_open_reads_stored_file(self):
+        digest = self.store.put(b"0123456789")
+
+        with self.store.open("cv.pdf", digest) as f:
+            self.assertEqual(f.read(), b"0123456789")
+        with self.assertRaises(FileNotFoundError):
+            self.store.open("missing.pdf")
+
+    def test_recent_files_evicts_least_recently_used(self):
+        paths = []
+        for i in range(3):
+            path = os.path.join(self.temp_dir.name, f"cv{i}.pdf")
+            with open(path, "wb") as f:
+                f.write(bytes([i]) * 40)
+            paths.append(path)
+        recent_files = RecentFiles(max_bytes=100)
+
+        self.assertEqual(recent_files.read(paths[0]), bytes([0]) * 40)
+        recent_files.read(paths[1])
+        recent_files.read(paths[2])
+
+        self.assertEqual(recent_files.paths(), paths[1:])
+        with patch('builtins.open') as mock_open:
+            self.assertEqual(recent_files.read(paths[2]), bytes([2]) * 40)
+            mock_open.assert_not_called()
+        self.assertIsNone(recent_files.read(os.path.join(self.temp_dir.name, "missing.pdf")))
+
+
+if __name__ == '__main__':
+    unittest.main()
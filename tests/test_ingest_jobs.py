@@ -0,0 +1,127 @@
+import os
+import tempfile
+import time
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, IngestJob, create_db_engine
+from ingest_jobs import IngestJobQueue
+
+
+class TestIngestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:")
+        self.Session = sessionmaker(bind=self.engine)
+        Base.metadata.create_all(self.engine)
+        self.handled = []
+        self.batches = []
+
+    def tearDown(self):
+        Base.metadata.drop_all(self.engine)
+
+    def handler(self, jobs):
+        self.batches.append([job["filename"] for job in jobs])
+        failures = {}
+        for job in jobs:
+            if job["filename"] == "broken.pdf":
+                failures[job["id"]] = "Could not extract text from broken.pdf"
+            elif job["filename"] == "copy.pdf":
+                failures[job["id"]] = ("duplicate", "Same content as a.pdf")
+            else:
+                self.handled.append((job["filename"], job["ocr_profile"]))
+        return failures
+
+    def test_run_pending_processes_jobs_in_order(self):
+        queue = IngestJobQueue(self.handler, session_factory=self.Session)
+        batch_id = queue.enqueue(["a.pdf", "broken.pdf", "b.pdf"], ocr_profile="fast")
+
+        self.assertEqual(queue.run_pending(), 3)
+
+        self.assertEqual(self.handled, [("a.pdf", "fast"), ("b.pdf", "fast")])
+        jobs = queue.batch_status(batch_id)
+        self.assertEqual([job["status"] for job in jobs], ["done", "failed", "done"])
+        self.assertIn("broken.pdf", jobs[1]["error"])
+        self.assertTrue(all(job["attempts"] == 1 for job in jobs))
+        self.assertEqual(queue.latest_batch_id(), batch_id)
+        self.assertEqual(queue.run_pending(), 0)
+
+    def test_handler_can_end_jobs_with_another_status(self):
+        queue = IngestJobQueue(self.handler, session_factory=self.Session)
+        batch_id = queue.enqueue(["a.pdf", "copy.pdf"])
+
+        queue.run_pending()
+
+        jobs = queue.batch_status(batch_id)
+        self.assertEqual([job["status"] for job in jobs], ["done", "duplicate"])
+        self.assertEqual(jobs[1]["error"], "Same content as a.pdf")
+
+    def test_jobs_are_claimed_in_batches(self):
+        queue = IngestJobQueue(self.handler, session_factory=self.Session, claim_size=2)
+        batch_id = queue.enqueue([f"cv{i}.pdf" for i in range(5)])
+
+        self.assertEqual(queue.run_pending(), 5)
+
+        self.assertEqual(self.batches, [["cv0.pdf", "cv1.pdf"], ["cv2.pdf", "cv3.pdf"], ["cv4.pdf"]])
+        self.assertTrue(all(job["status"] == "done" for job in queue.batch_status(batch_id)))
+
+    def test_handler_error_fails_whole_claim(self):
+        def crash(jobs):
+            raise RuntimeError("worker crashed")
+
+        queue = IngestJobQueue(crash, session_factory=self.Session)
+        batch_id = queue.enqueue(["a.pdf", "b.pdf"])
+        queue.run_pending()
+
+        jobs = queue.batch_status(batch_id)
+        self.assertEqual([(job["status"], job["error"]) for job in jobs],
+                         [("failed", "worker crashed"), ("failed", "worker crashed")])
+
+    def test_recover_requeues_interrupted_jobs(self):
+        session = self.Session()
+        try:
+            session.add_all([
+                IngestJob(batch_id="b1", filename="retry.pdf", status="running", attempts=1),
+                IngestJob(batch_id="b1", filename="crashy.pdf", status="running", attempts=3),
+                IngestJob(batch_id="b1", filename="done.pdf", status="done", attempts=1),
+            ])
+            session.commit()
+        finally:
+            session.close()
+        queue = IngestJobQueue(self.handler, session_factory=self.Session, max_attempts=3)
+
+        self.assertEqual(queue.recover(), 1)
+        queue.run_pending()
+
+        statuses = {job["filename"]: job["status"] for job in queue.batch_status("b1")}
+        self.assertEqual(statuses, {"retry.pdf": "done", "crashy.pdf": "failed", "done.pdf": "done"})
+        self.assertEqual(self.handled, [("retry.pdf", None)])
+
+    def test_workers_drain_queue_in_background(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_engine = create_db_engine(f"sqlite:///{os.path.join(temp_dir, 'jobs.db')}")
+            try:
+                Base.metadata.create_all(file_engine)
+                queue = IngestJobQueue(
+                    self.handler, session_factory=sessionmaker(bind=file_engine),
+                    workers=3, poll_seconds=0.05,
+                )
+                queue.start()
+                batch_id = queue.enqueue([f"cv{i}.pdf" for i in range(10)])
+                deadline = time.time() + 10
+                while time.time() < deadline:
+                    if all(job["status"] == "done" for job in queue.batch_status(batch_id)):
+                        break
+                    time.sleep(0.05)
+                queue.stop()
+
+                self.assertEqual(sorted(name for name, _ in self.handled),
+                                 sorted(f"cv{i}.pdf" for i in range(10)))
+                self.assertTrue(all(job["status"] == "done" for job in queue.batch_status(batch_id)))
+            finally:
+                file_engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
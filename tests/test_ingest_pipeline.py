@@ -0,0 +1,104 @@
+import threading
+import time
+import unittest
+
+from ingest_pipeline import run_ingest_pipeline
+
+
+def upsert_all(records):
+    return {"inserted": [record["filename"] for record in records], "updated": [], "failed": {}}
+
+
+def as_record(name):
+    return {"filename": name, "raw_text": name}
+
+
+def parse_all(texts):
+    return [{"skills": [text]} for text in texts]
+
+
+class TestIngestPipeline(unittest.TestCase):
+    def test_outcome_for_every_item(self):
+        def extract(name):
+            if name == "broken.pdf":
+                raise ValueError("corrupt PDF")
+            return {"filename": name, "raw_text": None if name == "blank.pdf" else f"text of {name}"}
+
+        saved = []
+
+        def persist(records):
+            saved.extend(records)
+            return upsert_all(records)
+
+        items = ["a.pdf", "broken.pdf", "blank.pdf", "b.pdf"]
+        outcomes = {o["filename"]: o for o in run_ingest_pipeline(items, extract, parse_all, persist)}
+
+        self.assertEqual(
+            {name: o["status"] for name, o in outcomes.items()},
+            {"a.pdf": "inserted", "broken.pdf": "failed", "blank.pdf": "no_text", "b.pdf": "inserted"},
+        )
+        self.assertEqual(outcomes["broken.pdf"]["error"], "corrupt PDF")
+        self.assertEqual(
+            sorted((r["filename"], r["raw_text"], r["skills"][0]) for r in saved),
+            [("a.pdf", "text of a.pdf", "text of a.pdf"), ("b.pdf", "text of b.pdf", "text of b.pdf")],
+        )
+
+    def test_parse_batches_queued_texts(self):
+        batch_sizes = []
+
+        def slow_parse(texts):
+            batch_sizes.append(len(texts))
+            time.sleep(0.1)
+            return parse_all(texts)
+
+        items = [f"cv{i}.pdf" for i in range(6)]
+        outcomes = list(run_ingest_pipeline(
+            items, as_record, slow_parse, upsert_all, queue_size=10
+        ))
+
+        self.assertEqual(len(outcomes), 6)
+        self.assertEqual(sum(batch_sizes), 6)
+        self.assertLess(len(batch_sizes), 6)
+
+    def test_bad_text_fails_alone(self):
+        def parse(texts):
+            if "bad" in texts:
+                raise ValueError("parser crashed")
+            return parse_all(texts)
+
+        items = ["good1", "bad", "good2"]
+        outcomes = {o["filename"]: o["status"] for o in run_ingest_pipeline(
+            items, as_record, parse, upsert_all, extract_workers=1
+        )}
+
+        self.assertEqual(outcomes, {"good1": "inserted", "bad": "failed", "good2": "inserted"})
+
+    def test_bounded_queues_apply_backpressure(self):
+        lock = threading.Lock()
+        counts = {"extracted": 0, "persisted": 0, "max_ahead": 0}
+
+        def extract(name):
+            with lock:
+                counts["extracted"] += 1
+                counts["max_ahead"] = max(counts["max_ahead"], counts["extracted"] - counts["persisted"])
+            return as_record(name)
+
+        def slow_persist(records):
+            time.sleep(0.01)
+            with lock:
+                counts["persisted"] += len(records)
+            return upsert_all(records)
+
+        items = [f"cv{i}.pdf" for i in range(30)]
+        outcomes = list(run_ingest_pipeline(
+            items, extract, parse_all, slow_persist,
+            extract_workers=1, queue_size=1, batch_size=1,
+        ))
+
+        self.assertEqual(len(outcomes), 30)
+        # One item in each of two queues plus one held by each of the three stages.
+        self.assertLessEqual(counts["max_ahead"], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
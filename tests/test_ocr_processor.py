@@ -1,7 +1,36 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, ANY
 import io
-from ocr_processor import extract_text_from_file, extract_text_from_pdf, extract_text_from_docx
+from ocr_processor import (
+    extract_text_from_file,
+    extract_text_from_pdf,
+    extract_text_from_pdf_with_report,
+    extract_text_from_docx,
+    is_usable_text_layer,
+    iter_ocr_pages,
+    resolve_ocr_profile,
+    extraction_settings,
+    _render_dpi,
+)
+
+
+def render_pages(images):
+    """Fake convert_from_bytes that returns the requested page range of images"""
+    def convert(file_bytes, dpi=200, first_page=1, last_page=None, grayscale=False):
+        return images[first_page - 1:last_page]
+    return convert
+
+
+def ocr_data(words, confidences):
+    """Minimal pytesseract.image_to_data dict for one line of words"""
+    return {
+        "text": words,
+        "conf": confidences,
+        "block_num": [1] * len(words),
+        "par_num": [1] * len(words),
+        "line_num": [1] * len(words),
+    }
+
 
 class TestOCRProcessor(unittest.TestCase):
     
@@ -13,7 +42,7 @@ class TestOCRProcessor(unittest.TestCase):
         
         result = extract_text_from_file(file_bytes, file_type)
         
-        mock_extract_pdf.assert_called_once_with(file_bytes)
+        mock_extract_pdf.assert_called_once_with(file_bytes, workers=None, profile=None)
         self.assertEqual(result, "Sample PDF text")
         
     @patch('ocr_processor.extract_text_from_docx')
@@ -43,23 +72,168 @@ class TestOCRProcessor(unittest.TestCase):
         
         self.assertIsNone(result)
         
+    @patch('ocr_processor.pdfinfo_from_bytes')
     @patch('ocr_processor.convert_from_bytes')
     @patch('ocr_processor.pytesseract.image_to_string')
-    def test_extract_text_from_pdf(self, mock_image_to_string, mock_convert_from_bytes):
+    def test_extract_text_from_pdf(self, mock_image_to_string, mock_convert_from_bytes, mock_pdfinfo):
         mock_image1 = MagicMock()
         mock_image2 = MagicMock()
-        mock_convert_from_bytes.return_value = [mock_image1, mock_image2]
+        mock_convert_from_bytes.side_effect = render_pages([mock_image1, mock_image2])
+        mock_pdfinfo.return_value = {"Pages": 2}
         
-        mock_image_to_string.side_effect = ["Page 1 content", "Page 2 content"]
+        mock_image_to_string.side_effect = lambda image, config: (
+            "Page 1 content" if image is mock_image1 else "Page 2 content"
+        )
         
         file_bytes = b"PDF bytes"
-        result = extract_text_from_pdf(file_bytes)
+        result = extract_text_from_pdf(file_bytes, workers=1)
         
-        mock_convert_from_bytes.assert_called_once_with(file_bytes)
+        mock_convert_from_bytes.assert_any_call(file_bytes, dpi=200, first_page=1, last_page=1, grayscale=True)
+        mock_convert_from_bytes.assert_any_call(file_bytes, dpi=200, first_page=2, last_page=2, grayscale=True)
         self.assertEqual(mock_image_to_string.call_count, 2)
         self.assertIn("Page 1 content", result)
         self.assertIn("Page 2 content", result)
+        mock_image1.close.assert_called_once()
+        mock_image2.close.assert_called_once()
         
+    @patch('ocr_processor.convert_from_bytes')
+    @patch('ocr_processor.extract_text_layer')
+    def test_extract_text_from_pdf_uses_text_layer(self, mock_text_layer, mock_convert_from_bytes):
+        page_text = "John Doe - Senior Software Engineer with Python and AWS experience"
+        mock_text_layer.return_value = [page_text, page_text]
+
+        text, report = extract_text_from_pdf_with_report(b"PDF bytes")
+
+        mock_convert_from_bytes.assert_not_called()
+        self.assertEqual(report["methods"], ["text_layer", "text_layer"])
+        self.assertIn("--- Page 2 ---", text)
+        self.assertIn(page_text, text)
+
+    @patch('ocr_processor.convert_from_bytes')
+    @patch('ocr_processor.pytesseract.image_to_string')
+    @patch('ocr_processor.extract_text_layer')
+    def test_extract_text_from_pdf_ocr_only_for_poor_pages(self, mock_text_layer,
+    mock_image_to_string, mock_convert_from_bytes):
+        page_text = "John Doe - Senior Software Engineer with Python and AWS experience"
+        mock_text_layer.return_value = [page_text, ""]
+        mock_convert_from_bytes.return_value = [MagicMock()]
+        mock_image_to_string.return_value = "Scanned page content"
+
+        text, report = extract_text_from_pdf_with_report(b"PDF bytes")
+
+        mock_convert_from_bytes.assert_called_once_with(b"PDF bytes", dpi=200, first_page=2, last_page=2, grayscale=True)
+        self.assertEqual(report["methods"], ["text_layer", "ocr"])
+        self.assertEqual(report["ocr_pages"], 1)
+        self.assertIn("Scanned page content", text)
+
+    @patch('ocr_processor.pdfinfo_from_bytes')
+    @patch('ocr_processor.convert_from_bytes')
+    @patch('ocr_processor.pytesseract.image_to_string')
+    def test_extract_text_from_pdf_parallel_keeps_page_order(self, mock_image_to_string,
+    mock_convert_from_bytes, mock_pdfinfo):
+        images = [MagicMock(name=f"page{i}") for i in range(1, 6)]
+        mock_convert_from_bytes.side_effect = render_pages(images)
+        mock_pdfinfo.return_value = {"Pages": 5}
+        mock_image_to_string.side_effect = lambda image, config: f"content of {images.index(image) + 1}"
+
+        result = extract_text_from_pdf(b"PDF bytes", workers=4)
+
+        positions = [result.index(f"--- Page {i} ---\ncontent of {i}") for i in range(1, 6)]
+        self.assertEqual(positions, sorted(positions))
+
+    @patch('ocr_processor.ThreadPoolExecutor')
+    @patch('ocr_processor.os.cpu_count')
+    @patch('ocr_processor.pdfinfo_from_bytes')
+    @patch('ocr_processor.convert_from_bytes')
+    @patch('ocr_processor.pytesseract.image_to_string')
+    def test_extract_text_from_pdf_serial_on_single_core(self, mock_image_to_string,
+    mock_convert_from_bytes, mock_pdfinfo, mock_cpu_count, mock_executor):
+        mock_convert_from_bytes.side_effect = render_pages([MagicMock(), MagicMock()])
+        mock_pdfinfo.return_value = {"Pages": 2}
+        mock_image_to_string.return_value = "Page content"
+        mock_cpu_count.return_value = 1
+
+        with patch('ocr_processor.OCR_WORKERS', None):
+            extract_text_from_pdf(b"PDF bytes")
+
+        mock_executor.assert_not_called()
+        self.assertEqual(mock_image_to_string.call_count, 2)
+
+    @patch('ocr_processor.pdfinfo_from_bytes')
+    @patch('ocr_processor.convert_from_bytes')
+    @patch('ocr_processor.pytesseract.image_to_string')
+    def test_iter_ocr_pages_renders_in_windows(self, mock_image_to_string,
+    mock_convert_from_bytes, mock_pdfinfo):
+        images = [MagicMock() for _ in range(5)]
+        mock_convert_from_bytes.side_effect = render_pages(images)
+        mock_pdfinfo.return_value = {"Pages": 5}
+        mock_image_to_string.return_value = "text"
+
+        pages = list(iter_ocr_pages(b"PDF bytes", window=2, max_pages=4))
+
+        self.assertEqual([n for n, _ in pages], [1, 2, 3, 4])
+        windows = [(c.kwargs["first_page"], c.kwargs["last_page"])
+                   for c in mock_convert_from_bytes.call_args_list]
+        self.assertEqual(windows, [(1, 2), (3, 4)])
+
+    @patch('ocr_processor.pdfinfo_from_bytes')
+    @patch('ocr_processor.convert_from_bytes')
+    @patch('ocr_processor.pytesseract.image_to_string')
+    def test_extract_text_from_pdf_fast_profile(self, mock_image_to_string,
+    mock_convert_from_bytes, mock_pdfinfo):
+        mock_convert_from_bytes.side_effect = render_pages([MagicMock()])
+        mock_pdfinfo.return_value = {"Pages": 1}
+        mock_image_to_string.return_value = "Page content"
+
+        extract_text_from_pdf(b"PDF bytes", profile="fast")
+
+        mock_convert_from_bytes.assert_called_once_with(
+            b"PDF bytes", dpi=150, first_page=1, last_page=1, grayscale=True
+        )
+        mock_image_to_string.assert_called_once_with(ANY, config="--oem 1 --psm 6")
+
+    @patch('ocr_processor.pdfinfo_from_bytes')
+    @patch('ocr_processor.convert_from_bytes')
+    @patch('ocr_processor.pytesseract.image_to_data')
+    def test_adaptive_profile_rerenders_low_confidence_pages(self, mock_image_to_data,
+    mock_convert_from_bytes, mock_pdfinfo):
+        low_res, high_res = MagicMock(), MagicMock()
+        mock_convert_from_bytes.side_effect = lambda file_bytes, dpi, **kwargs: (
+            [low_res] if dpi == 150 else [high_res]
+        )
+        mock_pdfinfo.return_value = {"Pages": 1}
+        mock_image_to_data.side_effect = lambda image, **kwargs: ocr_data(
+            ["Jchn", "D0e"], [35, 40]) if image is low_res else ocr_data(["John", "Doe"], [92, 95])
+
+        result = extract_text_from_pdf(b"PDF bytes", profile="adaptive", workers=1)
+
+        self.assertEqual(
+            [c.kwargs["dpi"] for c in mock_convert_from_bytes.call_args_list], [150, 300]
+        )
+        self.assertIn("John Doe", result)
+        high_res.close.assert_called_once()
+
+    def test_resolve_ocr_profile(self):
+        self.assertEqual(resolve_ocr_profile("accurate")["dpi"], 300)
+        self.assertEqual(resolve_ocr_profile(None)["name"], "balanced")
+        with self.assertRaises(ValueError):
+            resolve_ocr_profile("turbo")
+        self.assertNotEqual(extraction_settings("fast"), extraction_settings("accurate"))
+
+    def test_render_dpi_caps_oversized_pages(self):
+        a4 = (595, 842)
+        self.assertEqual(_render_dpi(a4, 200, 25_000_000), 200)
+        poster = (595 * 4, 842 * 4)
+        capped = _render_dpi(poster, 200, 25_000_000)
+        self.assertLess(capped, 200)
+        self.assertLessEqual((poster[0] * capped / 72) * (poster[1] * capped / 72), 25_000_000)
+
+    def test_is_usable_text_layer(self):
+        self.assertFalse(is_usable_text_layer(""))
+        self.assertFalse(is_usable_text_layer("Too short"))
+        self.assertFalse(is_usable_text_layer("\ufffd\u25a1" * 40))
+        self.assertTrue(is_usable_text_layer("Experienced engineer building web platforms since 2015."))
+
     @patch('ocr_processor.docx.Document')
     def test_extract_text_from_docx(self, mock_document):
         mock_doc = MagicMock()
@@ -0,0 +1,111 @@
+import unittest
+from unittest.mock import MagicMock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, CVDocument
+from reparse import count_stale, run_reparse
+
+
+def parsed_from(text):
+    return {"skills": [text.upper()], "education": []}
+
+
+class TestReparse(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:")
+        self.Session = sessionmaker(bind=self.engine)
+        Base.metadata.create_all(self.engine)
+        session = self.Session()
+        session.add_all([
+            CVDocument(filename="unversioned.pdf", raw_text="python", skills=["Old"]),
+            CVDocument(filename="old.pdf", raw_text="sql", skills=["Old"], parser_version=1),
+            CVDocument(filename="no_text.pdf", raw_text=None, skills=["Old"]),
+            CVDocument(filename="current.pdf", raw_text="go", skills=["Current"], parser_version=2),
+            CVDocument(filename="bad.pdf", raw_text="bad", skills=["Old"], parser_version=1),
+        ])
+        session.commit()
+        session.close()
+        self.parser = MagicMock(mode="full")
+        self.parser.parse.side_effect = self.parse
+        self.parser.parse_many.side_effect = lambda texts: [self.parse(text) for text in texts]
+
+    def tearDown(self):
+        Base.metadata.drop_all(self.engine)
+
+    def parse(self, text):
+        if text == "bad":
+            raise ValueError("parser crashed")
+        return parsed_from(text)
+
+    def stored(self):
+        session = self.Session()
+        try:
+            return {
+                doc.filename: (doc.skills, doc.parser_version)
+                for doc in session.query(CVDocument)
+            }
+        finally:
+            session.close()
+
+    def test_reparses_only_stale_rows(self):
+        progress = MagicMock()
+
+        stats = run_reparse(chunk_size=2, parser=self.parser, parser_version=2,
+                            session_factory=self.Session, progress=progress)
+
+        self.assertEqual((stats["total"], stats["reparsed"], stats["failed"]), (3, 2, 1))
+        self.assertEqual(self.stored(), {
+            "unversioned.pdf": (["PYTHON"], 2),
+            "old.pdf": (["SQL"], 2),
+            "no_text.pdf": (["Old"], None),
+            "current.pdf": (["Current"], 2),
+            "bad.pdf": (["Old"], 1),
+        })
+        self.assertEqual(progress.call_args_list[-1].args, (3, 3))
+        self.assertEqual(self.parser.parse_many.call_count, 2)
+
+    def test_rerun_resumes_with_remaining_rows(self):
+        run_reparse(chunk_size=2, parser=self.parser, parser_version=2, session_factory=self.Session)
+        self.parser.parse_many.reset_mock()
+        self.parser.parse_many.side_effect = lambda texts: [parsed_from(text) for text in texts]
+
+        stats = run_reparse(parser=self.parser, parser_version=2, session_factory=self.Session)
+
+        self.assertEqual((stats["total"], stats["reparsed"]), (1, 1))
+        self.parser.parse_many.assert_called_once_with(["bad"])
+        session = self.Session()
+        try:
+            self.assertEqual(count_stale(session, 2), 0)
+        finally:
+            session.close()
+
+    def test_upgrade_lite_reparses_lite_rows(self):
+        session = self.Session()
+        session.add(CVDocument(filename="lite.pdf", raw_text="rust", skills=["Rust"],
+                               parser_version=2, parse_mode="lite"))
+        session.commit()
+        session.close()
+
+        self.assertEqual(run_reparse(parser=self.parser, parser_version=2,
+                                     session_factory=self.Session)["total"], 3)
+        stats = run_reparse(parser=self.parser, parser_version=2,
+                            session_factory=self.Session, upgrade_lite=True)
+
+        self.assertEqual((stats["total"], stats["reparsed"]), (2, 1))
+        session = self.Session()
+        try:
+            doc = session.query(CVDocument).filter_by(filename="lite.pdf").one()
+            self.assertEqual((doc.skills, doc.parse_mode), (["RUST"], "full"))
+        finally:
+            session.close()
+
+        self.parser.mode = "lite"
+        with self.assertRaises(ValueError):
+            run_reparse(parser=self.parser, parser_version=2,
+                        session_factory=self.Session, upgrade_lite=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from database import Base, CVDocument, add_cv_aliases, current_generation
+from search_index import build_match_query, search_cvs
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        self.Session = sessionmaker(bind=self.engine)
+        Base.metadata.create_all(self.engine)
+        self.session = self.Session()
+        self.session.add_all([
+            CVDocument(filename="alice.pdf", raw_text="Alice builds data pipelines in Python",
+                       skills=["Python", "Airflow"], education=[{"degree": "BSc Physics"}]),
+            CVDocument(filename="bob.pdf", raw_text="Bob writes Java services",
+                       skills=["Java", "Docker"], education=[{"degree": "MSc Computer Science"}]),
+        ])
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+
+    def test_search_raw_text_with_prefix(self):
+        results = search_cvs(self.session, "pyth")
+        self.assertEqual([r["filename"] for r in results], ["alice.pdf"])
+        self.assertIn("**Python**", results[0]["snippet"])
+        self.assertEqual(search_cvs(self.session, "ruby"), [])
+
+    def test_search_single_section(self):
+        self.assertEqual([r["filename"] for r in search_cvs(self.session, "docker", column="skills")], ["bob.pdf"])
+        self.assertEqual(search_cvs(self.session, "degree", column="education"), [])
+        self.assertEqual(search_cvs(self.session, "airflow", column="education"), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        bob = self.session.query(CVDocument).filter_by(filename="bob.pdf").first()
+        bob.skills = ["Java", "Kubernetes"]
+        self.session.commit()
+        self.assertEqual([r["filename"] for r in search_cvs(self.session, "kubernetes")], ["bob.pdf"])
+        self.assertEqual(search_cvs(self.session, "docker"), [])
+
+        self.session.delete(bob)
+        self.session.commit()
+        self.assertEqual(search_cvs(self.session, "java"), [])
+
+    def test_search_finds_cv_by_alias(self):
+        self.session.add(CVDocument(filename="carol.pdf", content_hash="ccc", raw_text="Carol writes Go"))
+        self.session.commit()
+        generation = current_generation(self.session)
+
+        add_cv_aliases(self.session, [("cv_final.pdf", "ccc"), ("later.pdf", "ddd")])
+        self.session.commit()
+
+        self.assertEqual([r["filename"] for r in search_cvs(self.session, "cv_final")], ["carol.pdf"])
+        self.assertGreater(current_generation(self.session), generation)
+        # An alias recorded before its CV is saved is indexed along with it.
+        self.session.add(CVDocument(filename="dave.pdf", content_hash="ddd", raw_text="Dave writes Rust"))
+        self.session.commit()
+        self.assertEqual([r["filename"] for r in search_cvs(self.session, "later")], ["dave.pdf"])
+
+    def test_create_all_backfills_missing_rows(self):
+        self.session.execute(text("DELETE FROM cv_search"))
+        self.session.commit()
+        self.assertEqual(search_cvs(self.session, "python"), [])
+
+        Base.metadata.create_all(self.engine)
+
+        self.assertEqual(len(search_cvs(self.session, "python")), 1)
+
+    def test_build_match_query(self):
+        self.assertEqual(build_match_query("Python, C++!"), '"python"* "c"*')
+        self.assertEqual(build_match_query("docker", "skills"), '{skills} : ("docker"*)')
+        self.assertIsNone(build_match_query("  ++ "))
+        with self.assertRaises(ValueError):
+            build_match_query("docker", "raw_text) OR (filename")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from database import Base, CVDocument, CVSkill
+from skills_index import find_cvs_with_skills, parse_skill_filter, skill_distribution
+
+class TestSkillsIndex(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        self.Session = sessionmaker(bind=self.engine)
+        Base.metadata.create_all(self.engine)
+        self.session = self.Session()
+        self.session.add_all([
+            CVDocument(filename="alice.pdf", skills=["Python", " Docker ", "python"]),
+            CVDocument(filename="bob.pdf", skills=["Java", "Docker"]),
+            CVDocument(filename="carol.pdf", skills={"skills": ["Python", "SQL"]}),
+            CVDocument(filename="dave.pdf", skills=None),
+        ])
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+
+    def filenames(self, results):
+        return [r["filename"] for r in results]
+
+    def test_skills_are_normalized_on_insert(self):
+        rows = self.session.query(CVSkill.skill_normalized, CVSkill.skill_raw).join(
+            CVDocument, CVDocument.id == CVSkill.cv_id).filter(CVDocument.filename == "alice.pdf")
+        self.assertEqual(sorted(rows), [("docker", "Docker"), ("python", "Python")])
+
+    def test_find_cvs_with_all_skills(self):
+        self.assertEqual(self.filenames(find_cvs_with_skills(self.session, ["python", "DOCKER"])), ["alice.pdf"])
+        self.assertEqual(self.filenames(find_cvs_with_skills(self.session, ["Python"])), ["alice.pdf", "carol.pdf"])
+        self.assertEqual(find_cvs_with_skills(self.session, ["Python", "Rust"]), [])
+        self.assertEqual(find_cvs_with_skills(self.session, []), [])
+
+    def test_updates_and_deletes_are_reflected(self):
+        bob = self.session.query(CVDocument).filter_by(filename="bob.pdf").first()
+        bob.skills = ["Java", "Python", "Docker"]
+        self.session.commit()
+        self.assertEqual(self.filenames(find_cvs_with_skills(self.session, ["python", "docker"])),
+                         ["alice.pdf", "bob.pdf"])
+
+        self.session.delete(bob)
+        self.session.commit()
+        self.assertEqual(find_cvs_with_skills(self.session, ["java"]), [])
+
+    def test_skill_distribution(self):
+        self.assertEqual(skill_distribution(self.session),
+                         [("Docker", 2), ("Python", 2), ("Java", 1), ("SQL", 1)])
+        self.assertEqual(skill_distribution(self.session, limit=1), [("Docker", 2)])
+
+    def test_create_all_backfills_existing_rows(self):
+        self.session.execute(text("DELETE FROM cv_skills"))
+        self.session.commit()
+        self.assertEqual(skill_distribution(self.session), [])
+
+        Base.metadata.create_all(self.engine)
+
+        self.assertEqual(len(skill_distribution(self.session)), 4)
+
+    def test_parse_skill_filter(self):
+        self.assertEqual(parse_skill_filter("has Python AND Docker"), ["Python", "Docker"])
+        self.assertEqual(parse_skill_filter("machine learning, sql"), ["machine learning", "sql"])
+        self.assertEqual(parse_skill_filter("  "), [])
+
+if __name__ == '__main__':
+    unittest.main()